@@ -0,0 +1,132 @@
+"""
+Synthetic sales data generator for benchmarks
+Writes the exact TransactionID|Date|ProductID|... format of data/sales_data.txt,
+including the dirty rows the parser has to cope with
+
+Usage: python -m benchmarks.generate_sales_data --rows 1m --output benchmarks/data/sales_1m.txt
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+HEADER = 'TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region'
+SIZES = {'10k': 10_000, '1m': 1_000_000, '50m': 50_000_000}
+REGIONS = ['North', 'South', 'East', 'West']
+
+# ProductID → (name, name variants with commas, price range) - mirrors data/sales_data.txt
+PRODUCTS = {
+    'P101': ('Laptop', ['Laptop,Premium'], (55000, 82000)),
+    'P102': ('Mouse', ['Mouse,Wireless'], (400, 1100)),
+    'P103': ('Keyboard', ['Keyboard,Mechanical'], (1400, 2700)),
+    'P104': ('Monitor', ['Monitor,LED'], (9900, 23500)),
+    'P105': ('Webcam', ['Webcam,HD'], (2400, 4500)),
+    'P106': ('Headphones', [], (2800, 6500)),
+    'P107': ('USB Cable', [], (140, 330)),
+    'P108': ('External Hard Drive', ['External Hard Drive,1TB'], (3400, 8800)),
+    'P109': ('Wireless Mouse', ['Wireless Mouse,Gaming'], (500, 1900)),
+    'P110': ('Laptop Charger', ['Laptop Charger,65W'], (1500, 3100)),
+}
+
+# Share of rows for each dirty case (the rest are clean)
+DIRTY_RATES = {
+    'comma_thousands': 0.06,   # UnitPrice like 1,916
+    'comma_name': 0.12,        # ProductName like Mouse,Wireless
+    'zero_quantity': 0.02,
+    'negative_price': 0.01,
+    'missing_region': 0.02,
+    'missing_customer': 0.02,
+    'bad_transaction_id': 0.03,  # X611 instead of T...
+    'short_line': 0.005,       # fewer than 8 fields → rejected by the parser
+    'bad_number': 0.005,       # non-numeric quantity → rejected by the parser
+}
+
+def parse_size(value):
+    """'10k' / '1m' / '50m' or a plain integer"""
+    return SIZES.get(value.lower()) or int(value.replace('_', '').replace(',', ''))
+
+def extra_products(count):
+    """More distinct products for high-cardinality runs (P111, P112, ...)"""
+    products = dict(PRODUCTS)
+    for i in range(len(PRODUCTS), count):
+        products[f'P{101 + i}'] = (f'Product {101 + i}', [f'Product {101 + i},Deluxe'], (100, 20000))
+    return products
+
+def iter_rows(rows, seed=42, customers=None, products=10, days=31, start=date(2024, 12, 1)):
+    """Yields data lines (no header) - deterministic for a given seed"""
+    rng = random.Random(seed)
+    customers = customers or max(25, rows // 100)
+    catalog = extra_products(products) if products > len(PRODUCTS) else dict(list(PRODUCTS.items())[:products])
+    product_ids = list(catalog)
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(days)]
+    rates = list(DIRTY_RATES.items())
+
+    for i in range(rows):
+        prod_id = rng.choice(product_ids)
+        name, variants, (low, high) = catalog[prod_id]
+        trans_id = f'T{i + 1:06d}'
+        qty = str(rng.randint(1, 10))
+        price = rng.randint(low, high)
+        price_str = str(price)
+        cust = f'C{rng.randint(1, customers):03d}'
+        region = rng.choice(REGIONS)
+
+        for case, rate in rates:
+            if rng.random() >= rate:
+                continue
+            if case == 'comma_thousands' and price >= 1000:
+                price_str = f'{price:,}'
+            elif case == 'comma_name' and variants:
+                name = rng.choice(variants)
+            elif case == 'zero_quantity':
+                qty = '0'
+            elif case == 'negative_price':
+                price_str = str(-price)
+            elif case == 'missing_region':
+                region = ''
+            elif case == 'missing_customer':
+                cust = ''
+            elif case == 'bad_transaction_id':
+                trans_id = f'X{rng.randint(1, 999)}'
+            elif case == 'short_line':
+                yield f'{trans_id}|{rng.choice(dates)}|{prod_id}|{name}'
+                break
+            elif case == 'bad_number':
+                qty = 'N/A'
+        else:
+            yield f'{trans_id}|{rng.choice(dates)}|{prod_id}|{name}|{qty}|{price_str}|{cust}|{region}'
+
+def generate(filename, rows, seed=42, **options):
+    """Writes a synthetic sales file - returns its size in bytes"""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        f.write(HEADER + '\n')
+        batch = []
+        for line in iter_rows(rows, seed, **options):
+            batch.append(line)
+            if len(batch) >= 10000:
+                f.write('\n'.join(batch) + '\n')
+                batch = []
+        if batch:
+            f.write('\n'.join(batch) + '\n')
+    return os.path.getsize(filename)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic pipe-delimited sales data")
+    parser.add_argument('--rows', default='10k', help="10k, 1m, 50m or a row count")
+    parser.add_argument('--output', help="Output file (default: benchmarks/data/sales_<rows>.txt)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--customers', type=int, help="Distinct customers (default: rows / 100)")
+    parser.add_argument('--products', type=int, default=10, help="Distinct products")
+    parser.add_argument('--days', type=int, default=31, help="Distinct dates from 2024-12-01")
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    output = args.output or f'benchmarks/data/sales_{args.rows.lower()}.txt'
+    size = generate(output, rows, args.seed, customers=args.customers, products=args.products, days=args.days)
+    print(f"✅ Wrote {rows:,} rows ({size / 1e6:,.1f} MB) to {output}")
+
+if __name__ == '__main__':
+    main()
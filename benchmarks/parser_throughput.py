@@ -0,0 +1,93 @@
+"""
+Parser throughput: the original regex-per-field parser vs parse_transaction_line
+Both are run over the same lines, the records (and rejected lines) must be identical
+
+Usage:
+    python -m benchmarks.parser_throughput --rows 1m
+    python -m benchmarks.parser_throughput --input data/sales_data.txt --repeat 5
+"""
+import argparse
+import os
+import re
+import time
+
+from benchmarks.generate_sales_data import generate, parse_size
+from utils.data_processor import parse_transaction_line
+
+def regex_parse_line(line):
+    """Reference: the parser before the str.replace fast path (3 x re.sub per line)"""
+    fields = line.split('|')
+    if len(fields) < 8:
+        return None
+
+    trans_id = fields[0].strip()
+    date = fields[1].strip()
+    prod_id = fields[2].strip()
+    prod_name = re.sub(r',', ' ', fields[3].strip())
+    qty_str = re.sub(r',', '', fields[4].strip())
+    unit_str = re.sub(r',', '', fields[5].strip())
+    cust_id = fields[6].strip()
+    region = fields[7].strip()
+
+    try:
+        quantity = int(qty_str)
+        unit_price = float(unit_str)
+    except:
+        return None
+
+    return {
+        'TransactionID': trans_id,
+        'Date': date,
+        'ProductID': prod_id,
+        'ProductName': prod_name,
+        'Quantity': quantity,
+        'UnitPrice': unit_price,
+        'CustomerID': cust_id,
+        'Region': region
+    }
+
+PARSERS = [('regex (before)', regex_parse_line), ('str.replace (after)', parse_transaction_line)]
+
+def load_lines(filename):
+    """Data lines exactly as iter_sales_data yields them (stripped, no header/blank lines)"""
+    with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+        next(f, None)
+        return [line.strip() for line in f if line.strip()]
+
+def throughput(parse, lines, repeat=3):
+    """Best of `repeat` runs - returns (lines/sec, records)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = [t for t in map(parse, lines) if t is not None]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) / best, records
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare parser throughput (lines/sec)")
+    parser.add_argument('--rows', default='1m', help="10k, 1m, 50m or a row count (synthetic input)")
+    parser.add_argument('--input', help="Use an existing sales file instead of generating one")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per parser (fastest is kept)")
+    args = parser.parse_args()
+
+    input_file = args.input
+    if not input_file:
+        input_file = f'benchmarks/data/sales_{args.rows.lower()}_seed{args.seed}.txt'
+        if not os.path.exists(input_file):
+            print(f"Generating {input_file}...")
+            generate(input_file, parse_size(args.rows), args.seed)
+
+    lines = load_lines(input_file)
+    print(f"Parsing {len(lines):,} lines from {input_file}")
+
+    results = [(name, *throughput(parse, lines, args.repeat)) for name, parse in PARSERS]
+    baseline_rate, baseline_records = results[0][1], results[0][2]
+    for name, rate, records in results:
+        same = '' if records == baseline_records else '  ❌ records differ'
+        print(f"  {name:<22} {rate:>12,.0f} lines/s  x{rate / baseline_rate:.2f}  "
+              f"({len(lines) - len(records):,} rejected){same}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Times and memory-profiles each pipeline stage on a (synthetic) sales file
+Results are written as JSON so runs can be compared across versions
+
+Usage:
+    python -m benchmarks.run_benchmarks --rows 1m                  # generates the file if needed
+    python -m benchmarks.run_benchmarks --input big.txt --memory
+    python -m benchmarks.run_benchmarks --rows 1m --compare benchmarks/results/old.json
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.generate_sales_data import generate, parse_size
+from utils.file_handler import read_sales_data
+from utils.data_processor import (parse_transactions, validate_and_filter,
+                                  calculate_total_revenue, region_wise_sales,
+                                  top_selling_products, customer_analysis,
+                                  daily_sales_trend, find_peak_sales_day,
+                                  low_performing_products)
+from utils.aggregator import analyze_sales
+from utils.api_handler import create_product_mapping, enrich_sales_data, save_enriched_data
+from utils.report_generator import generate_sales_report
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (MB) - None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def measure(name, func, rows_in, memory=False, repeat=1, rows_out=None):
+    """
+    Runs one stage `repeat` times (output silenced) and keeps the fastest timing
+    rows_out: result → row count recorded for the stage (None: not a row-producing stage)
+    Returns: (result of the last run, stage record dict)
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        if memory:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if best is None or wall < best['wall_s']:
+            best = {'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4),
+                    'tracemalloc_peak_mb': round(peak / 1e6, 2) if peak is not None else None}
+
+    record = {'stage': name, 'rows_in': rows_in, 'rows_out': rows_out(result) if rows_out else None, **best, 'peak_rss_mb': peak_rss_mb()}
+    rate = f"{rows_in / best['wall_s']:>12,.0f} rows/s" if rows_in and best['wall_s'] else ' ' * 19
+    print(f"  {name:<32} {best['wall_s']:>9.3f}s  {rate}")
+    return result, record
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(input_file, memory=False, repeat=1, catalog_file='data/products.json'):
+    """Runs every stage in pipeline order - returns the list of stage records"""
+    with open(catalog_file, 'r') as f:
+        products = json.load(f)['products']
+    with contextlib.redirect_stdout(io.StringIO()):
+        mapping = create_product_mapping(products)
+
+    stages = []
+    def stage(name, func, rows_in, rows_out=len):
+        result, record = measure(name, func, rows_in, memory, repeat, rows_out)
+        stages.append(record)
+        return result
+
+    lines = stage('read_sales_data', lambda: read_sales_data(input_file), None)
+    transactions = stage('parse_transactions', lambda: parse_transactions(lines), len(lines))
+    del lines
+    valid, _, _ = stage('validate_and_filter', lambda: validate_and_filter(transactions), len(transactions),
+                        lambda r: len(r[0]))
+    n = len(valid)
+
+    stage('calculate_total_revenue', lambda: calculate_total_revenue(valid), n, None)
+    stage('region_wise_sales', lambda: region_wise_sales(valid), n)
+    stage('top_selling_products', lambda: top_selling_products(valid), n)
+    stage('customer_analysis', lambda: customer_analysis(valid), n)
+    stage('daily_sales_trend', lambda: daily_sales_trend(valid), n)
+    stage('find_peak_sales_day', lambda: find_peak_sales_day(valid), n, None)
+    stage('low_performing_products', lambda: low_performing_products(valid), n)
+    analyzed = lambda r: r['transaction_count']
+    results = stage('analyze_sales[python]', lambda: analyze_sales(valid), n, analyzed)
+    try:
+        import numpy  # noqa: F401 - optional backend
+        stage('analyze_sales[numpy]', lambda: analyze_sales(valid, backend='numpy'), n, analyzed)
+    except ImportError:
+        pass
+
+    enriched = stage('enrich_sales_data', lambda: enrich_sales_data(valid, mapping), n)
+    with tempfile.TemporaryDirectory() as tmp:
+        stage('save_enriched_data', lambda: save_enriched_data(enriched, os.path.join(tmp, 'enriched.txt')), n,
+              lambda saved: saved)
+        report = os.path.join(tmp, 'report.txt')
+        stage('generate_sales_report', lambda: generate_sales_report(valid, enriched, report), n, None)
+        stage('generate_sales_report[results]',
+              lambda: generate_sales_report(valid, enriched, report, results=results), n, None)
+    return stages
+
+def compare(stages, baseline_file):
+    """Prints wall-time ratios against a previous results file"""
+    with open(baseline_file, 'r') as f:
+        baseline = {s['stage']: s for s in json.load(f)['stages']}
+    print(f"\nComparison with {baseline_file} (ratio < 1 is faster):")
+    for s in stages:
+        old = baseline.get(s['stage'])
+        if old and old['wall_s']:
+            ratio = s['wall_s'] / old['wall_s']
+            flag = '  ⚠️ regression' if ratio > 1.10 else ''
+            print(f"  {s['stage']:<32} {old['wall_s']:>9.3f}s → {s['wall_s']:>9.3f}s  x{ratio:.2f}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sales analytics pipeline")
+    parser.add_argument('--rows', default='10k', help="10k, 1m, 50m or a row count (synthetic input)")
+    parser.add_argument('--input', help="Use an existing sales file instead of generating one")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per stage (fastest is kept)")
+    parser.add_argument('--memory', action='store_true', help="Track tracemalloc peaks (slower)")
+    parser.add_argument('--output', help="Results JSON (default: benchmarks/results/<time>_<rows>.json)")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    input_file = args.input
+    if not input_file:
+        input_file = f'benchmarks/data/sales_{args.rows.lower()}_seed{args.seed}.txt'
+        if not os.path.exists(input_file):
+            print(f"Generating {input_file}...")
+            generate(input_file, parse_size(args.rows), args.seed)
+
+    print(f"Benchmarking {input_file} ({os.path.getsize(input_file) / 1e6:,.1f} MB)")
+    stages = run(input_file, args.memory, args.repeat)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'input': input_file,
+            'input_bytes': os.path.getsize(input_file),
+            'rows': args.rows if not args.input else None,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'memory': args.memory,
+        },
+        'stages': stages
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"{datetime.now():%Y%m%d_%H%M%S}_{args.rows.lower()}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {output}")
+
+    if args.compare:
+        compare(stages, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Startup cost of a short report run
+- import profile: `python -X importtime -c "import main"`, slowest modules by cumulative time,
+  and whether any lazily loaded dependency (requests, asyncio, ...) was imported anyway
+- cold start: wall time of fresh `python main.py --offline ...` processes (local catalog,
+  no network) next to a bare `python -c pass`, checked against the targets below
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 20 --check    # exit 1 if a target is missed
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Targets for the sample data file on a warm page cache (a bare interpreter is ~60 ms here);
+# before lazy imports `import main` alone took ~150 ms, most of it requests
+IMPORT_TARGET_MS = 40
+COLD_START_TARGET_MS = 150
+
+# Loaded on first use only - none of these may appear when importing main
+LAZY_MODULES = ['requests', 'urllib3', 'asyncio', 'sqlite3', 'multiprocessing', 'numpy']
+
+def import_profile(module='main'):
+    """[(module, self µs, cumulative µs)] from one -X importtime run, in import order"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def median_wall_ms(command, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and cold-start time of main.py")
+    parser.add_argument('--input', default='data/sales_data.txt', help="Sales file for the cold-start run")
+    parser.add_argument('--runs', type=int, default=10, help="Processes per measurement (median is kept)")
+    parser.add_argument('--top', type=int, default=10, help="Slowest imports to list")
+    parser.add_argument('--check', action='store_true', help="Exit 1 if a target is missed")
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    main_ms = statistics.median(cumulative for profile in profiles
+                                for name, _, cumulative in profile if name == 'main') / 1000
+    print(f"import main: {main_ms:.1f} ms (target {IMPORT_TARGET_MS} ms, median of {args.runs})")
+    for name, self_us, cumulative_us in sorted(profiles[-1], key=lambda x: x[2], reverse=True)[:args.top]:
+        print(f"  {name:<40} {cumulative_us / 1000:>7.1f} ms  (self {self_us / 1000:.1f} ms)")
+    loaded = sorted({name for name, _, _ in profiles[-1]} & set(LAZY_MODULES))
+    if loaded:
+        print(f"  ❌ imported eagerly: {', '.join(loaded)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run = [sys.executable, 'main.py', '--input', args.input, '--offline', '--no-interactive',
+               '--no-cache', '--skip-enriched', '--report', os.path.join(tmp, 'report.txt')]
+        bare_ms = median_wall_ms([sys.executable, '-c', 'pass'], args.runs)
+        run_ms = median_wall_ms(run, args.runs)
+    print(f"cold start: {run_ms:.1f} ms (target {COLD_START_TARGET_MS} ms) | "
+          f"bare interpreter {bare_ms:.1f} ms → pipeline {run_ms - bare_ms:.1f} ms")
+
+    missed = main_ms > IMPORT_TARGET_MS or run_ms > COLD_START_TARGET_MS or loaded
+    if args.check and missed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,28 @@
-from utils.file_handler import read_sales_data
-from utils.data_processor import (parse_transactions, validate_and_filter, 
-                                 calculate_total_revenue, region_wise_sales, 
-                                 top_selling_products, customer_analysis, 
-                                 daily_sales_trend, find_peak_sales_day, 
-                                 low_performing_products)
-from utils.api_handler import fetch_all_products, create_product_mapping, enrich_sales_data
-from utils.report_generator import generate_sales_report
+from utils.file_handler import iter_sales_data
+from utils.data_processor import iter_transactions, validate_and_filter
+from utils.columnar import TransactionTable
+from utils.aggregator import analyze_sales, BACKENDS
+from utils.api_handler import (load_product_mapping, enrich_sales_data, save_enriched_data,
+                               summarize_enrichment_counts, wait_for_revalidation)
+from utils.table_cache import default_cache_file, load_table, save_table, source_signature
+from utils.instrumentation import Instrumentation
+from utils.parallel import FILTER_KEYS
+from utils.report_generator import generate_sales_report, RENDERERS
+import argparse
+import json
+import os
+import re
 import sys
 
+# Defaults (the SALES_* environment variables still work; CLI flags override them)
+ANALYTICS_BACKEND = os.environ.get('SALES_ANALYTICS_BACKEND', 'python')
+INCREMENTAL = os.environ.get('SALES_INCREMENTAL') == '1'
+OFFLINE = os.environ.get('SALES_OFFLINE') == '1'
+DATA_FILE = 'data/sales_data.txt'
+STATE_FILE = 'data/.sales_state.json'
+ENRICHED_FILE = 'data/enriched_sales_data.txt'
+REPORT_FILE = 'output/sales_report.txt'
+
 def print_step(step_num, step_desc, status=""):
     """Print formatted step progress"""
     print(f"\n[{step_num}/13] {step_desc}...", end=" ")
@@ -19,30 +34,29 @@ def print_step(step_num, step_desc, status=""):
 def get_user_filter(transactions):
     """Interactive filter selection"""
     print_step("", "Filter Options Available:")
-    
-    # Show regions
-    regions = list(set(t['Region'] for t in transactions if t.get('Region')))
-    regions = [r for r in regions if r]  # Remove empty
+
+    # Show regions (from the table's dictionary - no row scan)
+    regions = [r for r in transactions.distinct('Region') if r]  # Remove empty
     print(f"   Regions: {', '.join(regions)}")
-    
-    # Show amount range
-    amounts = [t['Quantity'] * t['UnitPrice'] for t in transactions]
+
+    # Show amount range (amount column is computed once and cached on the table)
+    amounts = transactions.amounts()
     print(f"   Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}")
-    
+
     choice = input("\nDo you want to filter data? (y/n): ").lower().strip()
     if choice != 'y':
         return transactions
-    
+
     # Get filter criteria
     region_filter = input("Enter region to filter (or Enter for none): ").strip()
     min_amount = input("Enter minimum amount (or Enter for none): ").strip()
     max_amount = input("Enter maximum amount (or Enter for none): ").strip()
-    
+
     min_amt_val = float(min_amount) if min_amount else None
     max_amt_val = float(max_amount) if max_amount else None
-    
+
     filtered, invalid, summary = validate_and_filter(
-        transactions, 
+        transactions,
         region=region_filter if region_filter else None,
         min_amount=min_amt_val,
         max_amount=max_amt_val
@@ -50,73 +64,411 @@ def get_user_filter(transactions):
     print(f"   Filtered to {len(filtered)} records")
     return filtered
 
-def main():
-    try:
-        print("=" * 47)
-        print("      SALES ANALYTICS SYSTEM")
-        print("=" * 47)
-        
-        # 1. Read sales data
-        print_step(1, "Reading sales data...")
-        raw_lines = read_sales_data('data/sales_data.txt')
-        print_step(1, "Reading sales data...", f"✓ Successfully read {len(raw_lines)} transactions")
-        
-        # 2. Parse data
-        print_step(2, "Parsing and cleaning data...")
-        transactions = parse_transactions(raw_lines)
-        print_step(2, "Parsing and cleaning data...", f"✓ Parsed {len(transactions)} records")
-        
-        # 3. Filter options
-        filtered_transactions = get_user_filter(transactions)
-        
-        # 4. Validate
-        print_step(4, "Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(filtered_transactions)
+# ============= COMMAND LINE =============
+# Spec names end up in report file names, stage names, .prof paths and metric labels
+SPEC_NAME_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+
+def spec_errors(spec):
+    """Problems with a filter spec's keys / name - empty if it is usable"""
+    errors = [f"unknown key '{key}' (keys: name, {', '.join(FILTER_KEYS)})"
+              for key in spec if key not in FILTER_KEYS + ['name']]
+    name = spec.get('name')
+    if name is not None and not SPEC_NAME_PATTERN.fullmatch(str(name)):
+        errors.append(f"bad name '{name}' (letters, digits, '_' and '-' only)")
+    return errors
+
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return value
+
+def parse_filter_spec(text):
+    """
+    'name=north,region=North,min_amount=1000,start_date=2024-12-01' → spec dict
+    Keys: name, region, min_amount, max_amount, start_date, end_date
+    """
+    spec = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        key, sep, value = part.partition('=')
+        key = key.strip().replace('-', '_')
+        if not sep or spec_errors({key: None}):
+            raise argparse.ArgumentTypeError(f"Bad filter '{part}' (use key=value with keys: "
+                                             f"name, {', '.join(FILTER_KEYS)})")
+        spec[key] = value.strip()
+    errors = spec_errors(spec)
+    if errors:
+        raise argparse.ArgumentTypeError(f"Bad filter '{text}': {'; '.join(errors)}")
+    return normalize_spec(spec)
+
+def normalize_spec(spec):
+    """Converts amount strings to floats and drops empty values"""
+    spec = {k: v for k, v in spec.items() if v not in (None, '')}
+    for key in ('min_amount', 'max_amount'):
+        if key in spec:
+            spec[key] = float(spec[key])
+    return spec
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Sales analytics pipeline - headless by default when not on a terminal",
+        epilog="Several --filter specs (or --filters-file) produce one report each from a single parse.")
+    parser.add_argument('--input', default=DATA_FILE, help=f"Sales data file (default: {DATA_FILE})")
+    parser.add_argument('--report', default=REPORT_FILE,
+                        help=f"Report file; with several filters '_<name>' is added (default: {REPORT_FILE})")
+    parser.add_argument('--format', dest='formats', action='append', choices=list(RENDERERS),
+                        help="Report format, repeatable - all rendered from one analysis (default: text)")
+    parser.add_argument('--top', dest='top_n', type=int, default=5, help="Products/customers to rank in the report")
+    parser.add_argument('--low-threshold', type=int, default=10, help="Units below which a product is low performing")
+    parser.add_argument('--enriched-output', default=ENRICHED_FILE,
+                        help=f"Enriched data file, .gz/.zst to compress (default: {ENRICHED_FILE})")
+    parser.add_argument('--skip-enriched', action='store_true', help="Do not write the enriched data file")
+
+    filters = parser.add_argument_group('filters')
+    filters.add_argument('--region', help="Only this region")
+    filters.add_argument('--min-amount', type=float, help="Minimum transaction amount")
+    filters.add_argument('--max-amount', type=float, help="Maximum transaction amount")
+    filters.add_argument('--start-date', help="First date, YYYY-MM-DD (inclusive)")
+    filters.add_argument('--end-date', help="Last date, YYYY-MM-DD (inclusive)")
+    filters.add_argument('--filter', dest='filters', action='append', type=parse_filter_spec, default=[],
+                         metavar='SPEC', help="Batch filter spec, repeatable: name=north,region=North,min_amount=1000")
+    filters.add_argument('--filters-file', help="JSON list of filter specs (same keys as --filter)")
+    filters.add_argument('--interactive', action=argparse.BooleanOptionalAction, default=None,
+                         help="Prompt for filters (default: only when stdin is a terminal and no filters given)")
+
+    execution = parser.add_argument_group('execution')
+    execution.add_argument('--cache-file', help="Binary parse cache (default: .<input name>.tbl next to the input)")
+    execution.add_argument('--no-cache', action='store_true', help="Always reparse the input, never read/write the cache")
+    execution.add_argument('--workers', type=non_negative_int, default=1,
+                           help="Worker processes for sharded parsing/aggregation (0 = all CPUs)")
+    execution.add_argument('--backend', choices=BACKENDS, default=ANALYTICS_BACKEND, help="Analytics backend")
+    execution.add_argument('--approximate', action='store_true',
+                           help="Bounded-memory sketches for customers/products on high-cardinality data")
+    execution.add_argument('--incremental', action='store_true', default=INCREMENTAL,
+                           help="Only parse lines appended since the last run")
+    execution.add_argument('--state-file', default=STATE_FILE, help="Incremental state file")
+    execution.add_argument('--offline', action='store_true', default=OFFLINE,
+                           help="Never call the catalog API: cached catalog, else the local products.json")
+    execution.add_argument('--async', dest='async_pipeline', action='store_true',
+                           help="Overlap the catalog fetch, parsing/aggregation and enrichment (batch streaming)")
+    execution.add_argument('--db', help="SQLite database: load the input once, then answer every run with SQL "
+                                        "(reloaded and re-enriched only when the input changes, no enriched file)")
+
+    metrics = parser.add_argument_group('instrumentation')
+    metrics.add_argument('--metrics', default=os.environ.get('SALES_METRICS'),
+                         help="Per-stage metrics file (.jsonl or Prometheus .prom)")
+    metrics.add_argument('--profile-dir', default=os.environ.get('SALES_PROFILE_DIR'),
+                         help="Write a cProfile dump per stage here")
+    metrics.add_argument('--trace-memory', action='store_true', default=os.environ.get('SALES_TRACEMALLOC') == '1',
+                         help="Record tracemalloc deltas per stage")
+    return parser
+
+def load_filter_specs(args):
+    """All filter specs of this run - at least one (possibly empty = no filter)"""
+    specs = list(args.filters)
+    if args.filters_file:
+        with open(args.filters_file, 'r', encoding='utf-8') as f:
+            file_specs = json.load(f)
+        for spec in file_specs:
+            errors = spec_errors(spec)
+            if errors:
+                raise ValueError(f"Bad filter spec in {args.filters_file}: {'; '.join(errors)}")
+            specs.append(normalize_spec(spec))
+    single = normalize_spec({key: getattr(args, key) for key in FILTER_KEYS})
+    if single or not specs:
+        specs.insert(0, single)
+    for i, spec in enumerate(specs, 1):
+        spec.setdefault('name', f'filter{i}')
+    return specs
+
+def report_path(base, spec, multiple):
+    """output/sales_report.txt → output/sales_report_<name>.txt when several reports are written"""
+    if not multiple:
+        return base
+    root, ext = os.path.splitext(base)
+    return f"{root}_{spec['name']}{ext}"
+
+def filter_kwargs(spec):
+    return {key: spec[key] for key in FILTER_KEYS if key in spec}
+
+# ============= RUN MODES =============
+def load_catalog(inst, step, offline=False):
+    print_step(step, "Fetching product data from API...")
+    with inst.stage('fetch_catalog') as stage:
+        product_mapping = load_product_mapping(paginate=True, offline=offline)
+        stage.rows_out = len(product_mapping)
+    print_step(step, "Fetching product data from API...", f"✓ Fetched {len(product_mapping)} products")
+    return product_mapping
+
+def run_incremental(inst, data_file=DATA_FILE, state_file=STATE_FILE, report_file=REPORT_FILE, formats=('text',),
+                    top_n=5, low_threshold=10, offline=False, filters=None):
+    """Aggregate only newly appended lines, then regenerate the report from saved state (filters: one spec's kwargs)"""
+    from utils.incremental import incremental_analyze
+    print_step(1, "Updating aggregates with appended data...")
+    with inst.stage('incremental_analyze') as stage:
+        aggregator, stats = incremental_analyze(data_file, state_file, **(filters or {}))
+        stage.rows_out = stats['new_records']
+    print_step(1, "Updating aggregates with appended data...",
+               f"✓ {stats['mode'].capitalize()} run: {stats['new_records']} new records")
+
+    product_mapping = load_catalog(inst, 2, offline)
+
+    print_step(3, "Generating report...")
+    with inst.stage('report', aggregator.transaction_count):
+        enrichment = summarize_enrichment_counts(aggregator.product_ids, product_mapping)
+        generate_sales_report(None, None, report_file, results=aggregator.results(top_n, low_threshold),
+                              enrichment=enrichment, formats=formats, top_n=top_n, low_threshold=low_threshold)
+    print_step(3, "Generating report...", f"✓ Report saved to: {report_file}")
+
+def run_parallel(inst, args, specs):
+    """Sharded multi-process parse + aggregation (rows are never materialized, no enriched file)"""
+    from utils.parallel import parallel_analyze_specs
+    print_step(1, "Parsing and aggregating in parallel...")
+    with inst.stage('parallel_analyze') as stage:
+        aggregators, stats = parallel_analyze_specs(args.input, specs, args.workers or None, args.approximate)
+        stage.rows_out = stats['parsed']
+    print_step(1, "Parsing and aggregating in parallel...",
+               f"✓ Parsed {stats['parsed']} records in {stats['shards']} shards | Invalid: {stats['invalid']}")
+
+    product_mapping = load_catalog(inst, 2, args.offline)
+
+    print_step(3, "Generating reports...")
+    for spec, aggregator in zip(specs, aggregators):
+        output_file = report_path(args.report, spec, len(specs) > 1)
+        with inst.stage(f"report_{spec['name']}", aggregator.transaction_count):
+            enrichment = summarize_enrichment_counts(aggregator.product_ids, product_mapping)
+            generate_sales_report(None, None, output_file, results=aggregator.results(args.top_n, args.low_threshold),
+                                  enrichment=enrichment, formats=args.formats, top_n=args.top_n,
+                                  low_threshold=args.low_threshold)
+    print_step(3, "Generating reports...", f"✓ {len(specs)} report(s) saved")
+
+def run_async(inst, args, specs):
+    """Streaming pipeline with the catalog fetch and enrichment running alongside ingestion"""
+    from utils.async_pipeline import analyze_async  # asyncio only for this mode
+
+    def catalog():
+        return load_product_mapping(paginate=True, offline=args.offline)
+
+    print_step(1, "Parsing, fetching catalog and enriching concurrently...")
+    enriched_output = None if args.skip_enriched else args.enriched_output
+    with inst.stage('async_pipeline') as stage:
+        aggregators, product_mapping, stats = analyze_async(args.input, specs, load_catalog=catalog,
+                                                            enriched_output=enriched_output,
+                                                            approximate=args.approximate)
+        stage.rows_out = stats['parsed']
+    print_step(1, "Parsing, fetching catalog and enriching concurrently...",
+               f"✓ Parsed {stats['parsed']} records | Invalid: {stats['invalid']} | "
+               f"Enriched {stats['matched']}/{stats['enriched']}")
+    print(f"   Catalog {stats['catalog_seconds']:.2f}s ‖ ingest {stats['ingest_seconds']:.2f}s "
+          f"→ total {stats['total_seconds']:.2f}s")
+
+    print_step(2, "Generating reports...")
+    for spec, aggregator in zip(specs, aggregators):
+        output_file = report_path(args.report, spec, len(specs) > 1)
+        with inst.stage(f"report_{spec['name']}", aggregator.transaction_count):
+            enrichment = summarize_enrichment_counts(aggregator.product_ids, product_mapping)
+            generate_sales_report(None, None, output_file, results=aggregator.results(args.top_n, args.low_threshold),
+                                  enrichment=enrichment, formats=args.formats, top_n=args.top_n,
+                                  low_threshold=args.low_threshold)
+    print_step(2, "Generating reports...", f"✓ {len(specs)} report(s) saved")
+
+def read_table(inst, args):
+    """Steps 1-2: parsed TransactionTable from the mmap parse cache if the source is unchanged, else streamed"""
+    print_step(1, "Reading sales data...")
+    cache_file = None if args.no_cache else (args.cache_file or default_cache_file(args.input))
+    transactions = None
+    if cache_file:
+        with inst.stage('load_cache') as stage:
+            transactions = load_table(cache_file, args.input)
+            stage.rows_out = len(transactions) if transactions is not None else 0
+
+    if transactions is not None:
+        print_step(1, "Reading sales data...", f"✓ Memory-mapped {cache_file}")
+        print_step(2, "Parsing and cleaning data...", f"✓ Loaded {len(transactions)} parsed records from cache")
+        return transactions
+
+    # Signed before reading: lines appended mid-parse make the cache stale instead of hiding behind it
+    signature = source_signature(args.input) if cache_file else None
+    raw_lines = iter_sales_data(args.input)
+    print_step(1, "Reading sales data...", f"✓ Streaming from {args.input}")
+
+    # Parse into a columnar table - no per-row dicts kept
+    print_step(2, "Parsing and cleaning data...")
+    with inst.stage('read_parse') as stage:
+        transactions = TransactionTable.from_transactions(iter_transactions(raw_lines))
+        stage.rows_out = len(transactions)
+    print_step(2, "Parsing and cleaning data...", f"✓ Parsed {len(transactions)} records")
+    if cache_file:
+        with inst.stage('save_cache', len(transactions)):
+            try:
+                save_table(transactions, cache_file, signature)
+            except OSError as e:
+                print(f"\n⚠️ Could not write parse cache {cache_file}: {e}")
+    return transactions
+
+def run_database(inst, args, specs):
+    """Analytics as SQL over a local SQLite store - the input is parsed and loaded only when it changed"""
+    from utils.sqlite_store import SalesStore
+    with SalesStore(args.db) as store:
+        if store.is_fresh(args.input):
+            print_step(1, "Opening sales database...", f"✓ {args.db} is up to date with {args.input}")
+        else:
+            signature = source_signature(args.input)  # Before reading, as for the parse cache
+            table = read_table(inst, args)
+            print_step(3, "Loading sales database...")
+            with inst.stage('load_db', len(table)) as stage:
+                stage.rows_out = store.load_transactions(table, signature)
+            print_step(3, "Loading sales database...", f"✓ Loaded {len(table)} records into {args.db}")
+        total, invalid = store.row_counts()
+
+        if store.has_enrichment():
+            print_step(4, "Fetching product data from API...", f"✓ Enrichment stored in {args.db}")
+        else:
+            product_mapping = load_catalog(inst, 4, args.offline)
+            with inst.stage('load_db_enriched') as stage:
+                stage.rows_out = store.load_enriched(product_mapping)
+
+        print_step(5, "Querying and generating reports...")
+        for spec in specs:
+            output_file = report_path(args.report, spec, len(specs) > 1)
+            filters = filter_kwargs(spec)
+            with inst.stage(f"query_{spec['name']}", total) as stage:
+                results = store.results(args.top_n, args.low_threshold, **filters)
+                enrichment = store.enrichment_summary(**filters)
+                stage.rows_out = results['transaction_count']
+            with inst.stage(f"report_{spec['name']}", results['transaction_count']):
+                generate_sales_report(None, None, output_file, results=results, enrichment=enrichment,
+                                      formats=args.formats, top_n=args.top_n, low_threshold=args.low_threshold)
+        print_step(5, "Querying and generating reports...",
+                   f"✓ {len(specs)} report(s) saved | Valid: {total - invalid} | Invalid: {invalid}")
+
+def run_pipeline(inst, args, specs, interactive):
+    """Single parse into a columnar table, then one validate/analyze/report per filter spec"""
+    # 1-2. Read + parse sales data
+    transactions = read_table(inst, args)
+
+    # 3. Filter options
+    if interactive:
+        with inst.stage('filter', len(transactions)) as stage:
+            transactions = get_user_filter(transactions)
+            stage.rows_out = len(transactions)
+
+    # 4-5. Validate + analyze once per filter spec (all share the parsed table)
+    batches = []
+    for spec in specs:
+        print_step(4, f"Validating transactions ({spec['name']})..." if len(specs) > 1 else "Validating transactions...")
+        with inst.stage(f"validate_{spec['name']}", len(transactions)) as stage:
+            valid_transactions, invalid_count, summary = validate_and_filter(transactions, **filter_kwargs(spec))
+            stage.rows_out = len(valid_transactions)
         print_step(4, "Validating transactions...", f"✓ Valid: {len(valid_transactions)} | Invalid: {invalid_count}")
-        
-        # 5. Analyze
+
         print_step(5, "Analyzing sales data...")
-        _ = calculate_total_revenue(valid_transactions)  # Trigger all analyses
-        _ = region_wise_sales(valid_transactions)
-        _ = top_selling_products(valid_transactions)
-        _ = customer_analysis(valid_transactions)
-        _ = daily_sales_trend(valid_transactions)
-        _ = find_peak_sales_day(valid_transactions)
-        _ = low_performing_products(valid_transactions)
+        with inst.stage(f"analyze_{spec['name']}", len(valid_transactions)):
+            results = analyze_sales(valid_transactions, args.top_n, args.low_threshold,
+                                    backend=args.backend, approximate=args.approximate)
         print_step(5, "Analyzing sales data...", "✓ Analysis complete")
-        
-        # 6. API
-        print_step(6, "Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_mapping = create_product_mapping(api_products)
-        print_step(6, "Fetching product data from API...", f"✓ Fetched {len(api_products)} products")
-        
-        # 7. Enrich
-        print_step(7, "Enriching sales data...")
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
-        enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match', False))
-        success_rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
-        print_step(7, "Enriching sales data...", f"✓ Enriched {enriched_count}/{len(enriched_transactions)} ({success_rate:.1f}%)")
-        
-        # 8. Save enriched
+        batches.append((spec, valid_transactions, results))
+
+    # 6. API
+    product_mapping = load_catalog(inst, 6, args.offline)
+
+    # 7. Enrich (single filter: its rows, batch: all valid rows)
+    print_step(7, "Enriching sales data...")
+    if len(specs) == 1:
+        to_enrich = batches[0][1]
+    else:
+        to_enrich, _, _ = validate_and_filter(transactions)
+    with inst.stage('enrich', len(to_enrich)) as stage:
+        enriched_transactions = enrich_sales_data(to_enrich, product_mapping)
+        stage.rows_out = len(enriched_transactions)
+    enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match', False))
+    success_rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
+    print_step(7, "Enriching sales data...", f"✓ Enriched {enriched_count}/{len(enriched_transactions)} ({success_rate:.1f}%)")
+
+    # 8. Save enriched
+    if not args.skip_enriched:
         print_step(8, "Saving enriched data...")
-        # Already saved in enrich_sales_data
-        print_step(8, "Saving enriched data...", "✓ Saved to: data/enriched_sales_data.txt")
-        
-        # 9. Generate report
+        with inst.stage('save_enriched', len(enriched_transactions)) as stage:
+            stage.rows_out = save_enriched_data(enriched_transactions, args.enriched_output)
+        print_step(8, "Saving enriched data...", f"✓ Saved to: {args.enriched_output}")
+
+    # 9. Generate report(s)
+    for spec, valid_transactions, results in batches:
+        output_file = report_path(args.report, spec, len(specs) > 1)
         print_step(9, "Generating report...")
-        generate_sales_report(valid_transactions, enriched_transactions)
-        print_step(9, "Generating report...", "✓ Report saved to: output/sales_report.txt")
-        
+        with inst.stage(f"report_{spec['name']}", len(valid_transactions)):
+            if len(specs) == 1:
+                generate_sales_report(valid_transactions, enriched_transactions, output_file, results=results,
+                                      formats=args.formats, top_n=args.top_n, low_threshold=args.low_threshold)
+            else:
+                enrichment = summarize_enrichment_counts(valid_transactions.value_counts('ProductID'), product_mapping)
+                generate_sales_report(None, None, output_file, results=results, enrichment=enrichment,
+                                      formats=args.formats, top_n=args.top_n, low_threshold=args.low_threshold)
+        print_step(9, "Generating report...", f"✓ Report saved to: {output_file}")
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    args.formats = args.formats or ['text']
+    try:
+        specs = load_filter_specs(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.incremental and args.approximate:
+        parser.error("--approximate cannot be combined with --incremental (sketches are not saved as state)")
+    if args.db and args.approximate:
+        parser.error("--approximate cannot be combined with --db (SQL aggregates are always exact)")
+    if args.backend != 'python' and (args.db or args.async_pipeline or args.workers != 1 or args.incremental):
+        print(f"⚠️ --backend {args.backend} only applies to the default pipeline - "
+              f"this run aggregates in {'SQL' if args.db else 'Python'}")
+    if args.incremental and len(specs) > 1:
+        parser.error("--incremental keeps state for a single filter spec - drop the extra --filter/--filters-file specs")
+    has_filters = len(specs) > 1 or any(filter_kwargs(spec) for spec in specs)
+    interactive = args.interactive
+    if interactive is None:
+        interactive = (sys.stdin.isatty() and not has_filters and not args.incremental and args.workers == 1
+                       and not args.db and not args.async_pipeline)
+
+    inst = Instrumentation(metrics_file=args.metrics, profile_dir=args.profile_dir, trace_memory=args.trace_memory)
+    try:
+        print("=" * 47)
+        print("      SALES ANALYTICS SYSTEM")
+        print("=" * 47)
+
+        if args.incremental:
+            run_incremental(inst, args.input, args.state_file, args.report, args.formats, args.top_n, args.low_threshold,
+                            args.offline, filter_kwargs(specs[0]))
+        elif args.db:
+            run_database(inst, args, specs)
+        elif args.async_pipeline:
+            run_async(inst, args, specs)
+        elif args.workers != 1:
+            run_parallel(inst, args, specs)
+        else:
+            run_pipeline(inst, args, specs, interactive)
+
         # 10. Complete
         print_step(10, "Process Complete!")
         print("=" * 47)
-        
+        return 0
+
     except KeyboardInterrupt:
         print("\n\n❌ Process interrupted by user")
+        return 130
     except Exception as e:
         print(f"\n\n❌ Error occurred: {str(e)}")
         print("Please check your data files and try again.")
+        return 1
+    finally:
+        inst.close()
+        if inst.records:
+            print("\nStage timings (slowest first):")
+            print(inst.summary())
+        # A stale catalog was served - let its background refresh reach the cache before exiting
+        if not wait_for_revalidation():
+            print("⚠️ Catalog refresh still running at exit - the next run retries")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
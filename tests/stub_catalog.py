@@ -0,0 +1,80 @@
+"""
+Local stand-in for the dummyjson catalog API (http://127.0.0.1:<port>/products)
+- ?limit=&skip= pages over `products`, with the API's total/skip/limit fields
+- ETag "v<version>" on every response; If-None-Match with the current ETag → 304
+- fail_next: status codes to return (in order) before serving normally
+Every request is recorded as (skip, If-None-Match header)
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+def make_products(count, title='Product'):
+    return [{'id': i, 'title': f'{title} {i}', 'category': 'misc', 'brand': 'Acme', 'rating': 4.5}
+            for i in range(1, count + 1)]
+
+class StubCatalog:
+
+    def __init__(self, products):
+        self.products = products
+        self.version = 1
+        self.fail_next = []
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+
+    @property
+    def url(self):
+        """Single-request catalog URL (as CATALOG_URL)"""
+        return f'http://127.0.0.1:{self.server.server_port}/products?limit=100'
+
+    def update(self, products):
+        """Publishes a new catalog version (new ETag)"""
+        self.products = products
+        self.version += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                skip = int(query.get('skip', ['0'])[0])
+                limit = int(query.get('limit', ['30'])[0])
+                etag = f'"v{stub.version}"'
+                with stub._lock:
+                    stub.requests.append((skip, self.headers.get('If-None-Match')))
+                    status = stub.fail_next.pop(0) if stub.fail_next else None
+                if status is not None:
+                    self.send_response(status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                body = json.dumps({'products': stub.products[skip:skip + limit], 'total': len(stub.products),
+                                   'skip': skip, 'limit': limit}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
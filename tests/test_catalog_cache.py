@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utils import api_handler
+from utils.api_handler import fetch_all_products, wait_for_revalidation, save_catalog_cache, load_catalog_cache
+from tests.stub_catalog import StubCatalog, make_products
+
+class CatalogCacheTest(unittest.TestCase):
+    """Stale-while-revalidate against a local stub catalog"""
+
+    def setUp(self):
+        self.stub = StubCatalog(make_products(100)).__enter__()
+        self.addCleanup(self.stub.__exit__)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_file = os.path.join(tmp.name, 'products_cache.json')
+
+    def write_cache(self, age, etag='"v1"', products=None):
+        save_catalog_cache({'url': self.stub.url, 'fetched_at': time.time() - age, 'etag': etag,
+                            'last_modified': None, 'products': products or make_products(100)}, self.cache_file)
+
+    def test_fresh_cache_makes_no_request(self):
+        self.write_cache(age=0)
+        products = fetch_all_products(self.stub.url, cache_file=self.cache_file)
+        self.assertEqual(len(products), 100)
+        self.assertEqual(self.stub.requests, [])
+
+    def test_stale_cache_is_served_then_revalidated(self):
+        self.write_cache(age=api_handler.CACHE_TTL + 60, products=make_products(100, 'Old'))
+        before = load_catalog_cache(self.cache_file)['fetched_at']
+
+        products = fetch_all_products(self.stub.url, cache_file=self.cache_file)
+        self.assertEqual(products[0]['title'], 'Old 1')  # Stale copy, no wait on the network
+        self.assertTrue(wait_for_revalidation(timeout=10))
+
+        self.assertEqual(self.stub.requests, [(0, '"v1"')])
+        cache = load_catalog_cache(self.cache_file)
+        self.assertGreater(cache['fetched_at'], before)  # 304: refreshed in place
+        self.assertEqual(cache['products'][0]['title'], 'Old 1')
+
+    def test_background_refresh_replaces_changed_catalog(self):
+        self.write_cache(age=api_handler.CACHE_TTL + 60)
+        self.stub.update(make_products(100, 'New'))
+
+        fetch_all_products(self.stub.url, cache_file=self.cache_file)
+        self.assertTrue(wait_for_revalidation(timeout=10))
+
+        cache = load_catalog_cache(self.cache_file)
+        self.assertEqual(cache['etag'], '"v2"')
+        self.assertEqual(cache['products'][0]['title'], 'New 1')
+
+    def test_inline_revalidation_keeps_stale_copy_when_api_fails(self):
+        self.write_cache(age=api_handler.CACHE_TTL + 60, products=make_products(100, 'Old'))
+        self.stub.fail_next = [503]
+        products = fetch_all_products(self.stub.url, cache_file=self.cache_file, stale_while_revalidate=False)
+        self.assertEqual(products[0]['title'], 'Old 1')
+
+    def test_cache_write_failure_still_returns_products(self):
+        with mock.patch.object(api_handler, 'save_catalog_cache', side_effect=OSError('read-only')):
+            products = fetch_all_products(self.stub.url, cache_file=self.cache_file)
+        self.assertEqual(len(products), 100)
+        self.assertFalse(os.path.exists(self.cache_file))
+
+if __name__ == '__main__':
+    unittest.main()
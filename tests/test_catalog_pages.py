@@ -0,0 +1,72 @@
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+
+from utils import api_handler
+from utils.api_handler import iter_catalog_pages, load_product_mapping, load_catalog_cache, save_catalog_cache
+from tests.stub_catalog import StubCatalog, make_products
+
+class CatalogPagesTest(unittest.TestCase):
+    """Paginated fetch and conditional revalidation against a local stub catalog"""
+
+    def setUp(self):
+        self.stub = StubCatalog(make_products(250)).__enter__()
+        self.addCleanup(self.stub.__exit__)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_file = os.path.join(tmp.name, 'products_cache.json')
+
+    def load(self):
+        return load_product_mapping(self.stub.url, paginate=True, cache_file=self.cache_file,
+                                    stale_while_revalidate=False)
+
+    def expire_cache(self):
+        cache = load_catalog_cache(self.cache_file)
+        cache['fetched_at'] = time.time() - api_handler.CACHE_TTL - 60
+        save_catalog_cache(cache, self.cache_file)
+        self.stub.requests.clear()
+
+    def test_first_fetch_walks_every_page_and_caches_validators(self):
+        mapping = self.load()
+        self.assertEqual(len(mapping), 250)
+        self.assertEqual(mapping[250]['title'], 'Product 250')
+        self.assertEqual(sorted(skip for skip, _ in self.stub.requests), [0, 100, 200])
+        cache = load_catalog_cache(self.cache_file)
+        self.assertEqual(cache['etag'], '"v1"')
+        self.assertTrue(cache['paginated'])
+
+    def test_unchanged_catalog_is_revalidated_with_one_request(self):
+        self.load()
+        self.expire_cache()
+        mapping = self.load()
+        self.assertEqual(self.stub.requests, [(0, '"v1"')])
+        self.assertEqual(len(mapping), 250)
+        self.assertLess(time.time() - load_catalog_cache(self.cache_file)['fetched_at'], api_handler.CACHE_TTL)
+
+    def test_changed_catalog_is_refetched(self):
+        self.load()
+        self.expire_cache()
+        self.stub.update(make_products(120, 'New'))
+        mapping = self.load()
+        self.assertEqual(sorted(skip for skip, _ in self.stub.requests), [0, 100])
+        self.assertEqual(len(mapping), 120)
+        self.assertEqual(mapping[1]['title'], 'New 1')
+        self.assertEqual(load_catalog_cache(self.cache_file)['etag'], '"v2"')
+
+    def test_failed_page_is_retried(self):
+        self.stub.fail_next = [503]
+        pages = list(iter_catalog_pages(self.stub.url.split('?')[0], backoff=0))
+        self.assertEqual(sum(len(page) for page in pages), 250)
+        self.assertEqual(len(self.stub.requests), 4)
+
+    def test_dead_endpoint_fails_fast(self):
+        self.stub.fail_next = [503, 503]
+        with self.assertRaises(requests.HTTPError):
+            list(iter_catalog_pages(self.stub.url.split('?')[0], retries=3, backoff=0))
+        self.assertEqual(len(self.stub.requests), 2)  # Page 0 is retried only once
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.api_handler import create_product_mapping, summarize_enrichment_counts
+from utils.sqlite_store import SalesStore
+from utils.table_cache import source_signature
+from tests.stub_catalog import make_products
+from tests.test_table_cache import SAMPLE, EXTRA_LINE, parse
+
+class SalesStoreTest(unittest.TestCase):
+    """SQLite store freshness and stored enrichment"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, 'sales_data.txt')
+        shutil.copyfile(SAMPLE, self.source)
+        self.store = SalesStore(os.path.join(tmp.name, 'sales.db'))
+        self.addCleanup(self.store.close)
+        self.mapping = create_product_mapping(make_products(105))  # P101-P105 match, P106+ do not
+
+    def load(self):
+        table = parse(self.source)
+        self.store.load_transactions(table, source_signature(self.source))
+        return table
+
+    def test_loaded_source_is_fresh(self):
+        self.assertFalse(self.store.is_fresh(self.source))
+        self.load()
+        self.assertTrue(self.store.is_fresh(self.source))
+
+    def test_append_during_load_is_not_fresh(self):
+        signature = source_signature(self.source)  # As run_database: signed before reading
+        table = parse(self.source)
+        with open(self.source, 'a', encoding='utf-8') as f:
+            f.write(EXTRA_LINE)
+        self.store.load_transactions(table, signature)
+        self.assertFalse(self.store.is_fresh(self.source))
+
+    def test_enriched_view_matches_valid_rows(self):
+        table = self.load()
+        valid_rows, _ = table.valid_rows()
+        self.assertEqual(self.store.load_enriched(self.mapping), len(valid_rows))
+
+        rows = self.store.conn.execute('SELECT id, transaction_id, product_id FROM enriched ORDER BY id').fetchall()
+        self.assertEqual([row[0] for row in rows], list(valid_rows))
+        for i, transaction_id, product_id in rows:
+            self.assertEqual(transaction_id, table.row(i)['TransactionID'])
+            self.assertEqual(product_id, table.row(i)['ProductID'])
+
+    def test_enrichment_summary_matches_in_memory(self):
+        table = self.load()
+        self.store.load_enriched(self.mapping)
+        valid_rows, _ = table.valid_rows()
+        expected = summarize_enrichment_counts(table.take(valid_rows).value_counts('ProductID'), self.mapping)
+        self.assertEqual(self.store.enrichment_summary(), expected)
+
+    def test_reload_clears_enrichment(self):
+        self.load()
+        self.store.load_enriched(self.mapping)
+        self.assertTrue(self.store.has_enrichment())
+        self.load()
+        self.assertFalse(self.store.has_enrichment())
+        self.assertEqual(self.store.conn.execute('SELECT COUNT(*) FROM enriched').fetchone()[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
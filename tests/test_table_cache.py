@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.columnar import TransactionTable
+from utils.data_processor import iter_transactions
+from utils.file_handler import iter_sales_data
+from utils.table_cache import load_table, save_table, source_signature
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'sales_data.txt')
+EXTRA_LINE = 'T999|2024-12-31|P101|Laptop|1|1000|C001|North\n'
+
+def parse(source):
+    return TransactionTable.from_transactions(iter_transactions(iter_sales_data(source)))
+
+class TableCacheTest(unittest.TestCase):
+    """Parse cache freshness - the parse → append → save race included"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, 'sales_data.txt')
+        self.cache_file = os.path.join(tmp.name, '.sales_data.txt.tbl')
+        shutil.copyfile(SAMPLE, self.source)
+
+    def test_unchanged_source_loads_from_cache(self):
+        table = parse(self.source)
+        save_table(table, self.cache_file, source_signature(self.source))
+        cached = load_table(self.cache_file, self.source)
+        self.assertIsNotNone(cached)
+        self.assertEqual(len(cached), len(table))
+        self.assertEqual(list(cached), list(table))
+
+    def test_append_during_parse_makes_cache_stale(self):
+        signature = source_signature(self.source)  # As read_table: signed before reading
+        table = parse(self.source)
+        with open(self.source, 'a', encoding='utf-8') as f:
+            f.write(EXTRA_LINE)
+        save_table(table, self.cache_file, signature)
+        self.assertIsNone(load_table(self.cache_file, self.source))
+
+    def test_same_size_edit_is_detected_by_hash(self):
+        save_table(parse(self.source), self.cache_file, source_signature(self.source))
+        with open(self.source, 'r+b') as f:
+            data = f.read()
+            f.seek(0)
+            f.write(data.replace(b'North', b'NORTH'))
+        self.assertIsNone(load_table(self.cache_file, self.source))
+
+    def test_touched_but_unchanged_source_still_loads(self):
+        save_table(parse(self.source), self.cache_file, source_signature(self.source))
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(load_table(self.cache_file, self.source))
+
+    def test_corrupt_cache_is_ignored(self):
+        with open(self.cache_file, 'wb') as f:
+            f.write(b'not a cache')
+        self.assertIsNone(load_table(self.cache_file, self.source))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,424 @@
+from utils.ranking import Ranking
+from utils.sketches import HyperLogLog, SpaceSaving
+from utils.timeseries import DailySeries
+
+class SalesAggregator:
+    """
+    Computes every sales analytic in a single pass over the transactions
+    Feed rows with add()/update(), then call results() for the bundle
+    """
+
+    def __init__(self):
+        self.total_revenue = 0.0
+        self.transaction_count = 0
+        self.first_date = None
+        self.last_date = None
+        self.regions = {}     # region → {'total_sales', 'transaction_count'}
+        self.products = {}    # product name → {'total_qty', 'total_revenue'}
+        self.customers = {}   # customer ID → {'total_spent', 'purchase_count', 'products_bought'}
+        self.daily = {}       # date → {'revenue', 'transaction_count', 'unique_customers'}
+        self.product_ids = {}  # ProductID → row count (enrichment summary without rows)
+
+    def add(self, t):
+        """Adds one transaction to every running total"""
+        qty = t['Quantity']
+        amount = qty * t['UnitPrice']
+        date = t['Date']
+        name = t['ProductName']
+        cust = t['CustomerID']
+
+        self.total_revenue += amount
+        self.transaction_count += 1
+        if self.first_date is None or date < self.first_date:
+            self.first_date = date
+        if self.last_date is None or date > self.last_date:
+            self.last_date = date
+
+        region = self.regions.get(t['Region'])
+        if region is None:
+            region = self.regions[t['Region']] = {'total_sales': 0.0, 'transaction_count': 0}
+        region['total_sales'] += amount
+        region['transaction_count'] += 1
+
+        self._add_product(name, qty, amount)
+        self._add_customer(cust, amount, name)
+
+        day = self.daily.get(date)
+        if day is None:
+            day = self.daily[date] = {'revenue': 0.0, 'transaction_count': 0,
+                                      'unique_customers': self._new_day_customers()}
+        day['revenue'] += amount
+        day['transaction_count'] += 1
+        day['unique_customers'].add(cust)
+
+        self.product_ids[t['ProductID']] = self.product_ids.get(t['ProductID'], 0) + 1
+
+    # Per-dimension hooks of add() - subclasses override only the dimensions they store differently
+    def _add_product(self, name, qty, amount):
+        product = self.products.get(name)
+        if product is None:
+            product = self.products[name] = {'total_qty': 0, 'total_revenue': 0.0}
+        product['total_qty'] += qty
+        product['total_revenue'] += amount
+
+    def _add_customer(self, cust, amount, name):
+        customer = self.customers.get(cust)
+        if customer is None:
+            customer = self.customers[cust] = {
+                'total_spent': 0.0,
+                'purchase_count': 0,
+                'products_bought': set()
+            }
+        customer['total_spent'] += amount
+        customer['purchase_count'] += 1
+        customer['products_bought'].add(name)
+
+    def _new_day_customers(self):
+        return set()
+
+    def update(self, transactions):
+        """Adds an iterable of transactions (list or stream) - returns self"""
+        add = self.add
+        for t in transactions:
+            add(t)
+        return self
+
+    def merge(self, other):
+        """
+        Folds another aggregator's partial totals into this one - returns self
+        Merge shards in file order to keep first-seen ordering of ties
+        """
+        self._merge_totals(other)
+        self._merge_products(other)
+        self._merge_customers(other)
+        self._merge_daily(other)
+        return self
+
+    def _merge_totals(self, other):
+        self.total_revenue += other.total_revenue
+        self.transaction_count += other.transaction_count
+        if other.first_date is not None and (self.first_date is None or other.first_date < self.first_date):
+            self.first_date = other.first_date
+        if other.last_date is not None and (self.last_date is None or other.last_date > self.last_date):
+            self.last_date = other.last_date
+
+        for region, data in other.regions.items():
+            mine = self.regions.setdefault(region, {'total_sales': 0.0, 'transaction_count': 0})
+            mine['total_sales'] += data['total_sales']
+            mine['transaction_count'] += data['transaction_count']
+
+        for prod_id, count in other.product_ids.items():
+            self.product_ids[prod_id] = self.product_ids.get(prod_id, 0) + count
+
+    def _merge_products(self, other):
+        for name, data in other.products.items():
+            mine = self.products.setdefault(name, {'total_qty': 0, 'total_revenue': 0.0})
+            mine['total_qty'] += data['total_qty']
+            mine['total_revenue'] += data['total_revenue']
+
+    def _merge_customers(self, other):
+        for cust, data in other.customers.items():
+            mine = self.customers.setdefault(cust, {'total_spent': 0.0, 'purchase_count': 0, 'products_bought': set()})
+            mine['total_spent'] += data['total_spent']
+            mine['purchase_count'] += data['purchase_count']
+            mine['products_bought'] |= data['products_bought']
+
+    def _merge_daily(self, other):
+        for date, data in other.daily.items():
+            mine = self.daily.setdefault(date, {'revenue': 0.0, 'transaction_count': 0, 'unique_customers': set()})
+            mine['revenue'] += data['revenue']
+            mine['transaction_count'] += data['transaction_count']
+            mine['unique_customers'] |= data['unique_customers']
+
+    def to_state(self):
+        """JSON-serializable snapshot of the running totals (sets become lists)"""
+        return {
+            'total_revenue': self.total_revenue,
+            'transaction_count': self.transaction_count,
+            'first_date': self.first_date,
+            'last_date': self.last_date,
+            'regions': self.regions,
+            'products': self.products,
+            'customers': {cust: dict(data, products_bought=list(data['products_bought']))
+                          for cust, data in self.customers.items()},
+            'daily': {date: dict(data, unique_customers=list(data['unique_customers']))
+                      for date, data in self.daily.items()},
+            'product_ids': self.product_ids
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuilds an aggregator from to_state() output"""
+        aggregator = cls()
+        aggregator.total_revenue = state['total_revenue']
+        aggregator.transaction_count = state['transaction_count']
+        aggregator.first_date = state['first_date']
+        aggregator.last_date = state['last_date']
+        aggregator.regions = state['regions']
+        aggregator.products = state['products']
+        aggregator.customers = {cust: dict(data, products_bought=set(data['products_bought']))
+                                for cust, data in state['customers'].items()}
+        aggregator.daily = {date: dict(data, unique_customers=set(data['unique_customers']))
+                            for date, data in state['daily'].items()}
+        aggregator.product_ids = state['product_ids']
+        return aggregator
+
+    # ---------- Result views (same shapes as utils.data_processor) ----------
+    def region_sales(self):
+        """Same result as region_wise_sales()"""
+        total_sales = round(self.total_revenue, 2)
+        regions = {}
+        for region, data in self.regions.items():
+            regions[region] = dict(data)
+            regions[region]['percentage'] = round((data['total_sales'] / total_sales) * 100, 2)
+        return dict(sorted(regions.items(), key=lambda x: x[1]['total_sales'], reverse=True))
+
+    def product_totals(self):
+        """List of (name, total_qty, revenue) in first-seen order"""
+        return [(name, data['total_qty'], round(data['total_revenue'], 2))
+                for name, data in self.products.items()]
+
+    def product_ranking(self):
+        """Ranking over the running product totals (no copy)"""
+        return Ranking(self.products)
+
+    def customer_ranking(self):
+        """Ranking over the running customer totals (no copy)"""
+        return Ranking(self.customers)
+
+    def top_products(self, n=5):
+        """Same result as top_selling_products()"""
+        return [(name, data['total_qty'], round(data['total_revenue'], 2))
+                for name, data in self.product_ranking().top(n, 'total_qty')]
+
+    def low_products(self, threshold=10):
+        """Same result as low_performing_products()"""
+        return [(name, data['total_qty'], round(data['total_revenue'], 2))
+                for name, data in self.product_ranking().below(threshold, 'total_qty')]
+
+    @staticmethod
+    def _customer_entry(data):
+        return {
+            'total_spent': data['total_spent'],
+            'purchase_count': data['purchase_count'],
+            'products_bought': list(data['products_bought']),
+            'avg_order_value': round(data['total_spent'] / data['purchase_count'], 2)
+        }
+
+    def customer_summary(self):
+        """Same result as customer_analysis()"""
+        ranked = sorted(self.customers.items(), key=lambda x: x[1]['total_spent'], reverse=True)
+        return {cust: self._customer_entry(data) for cust, data in ranked}
+
+    def top_customers(self, n=5):
+        """Same result as top_customers() - only n customers are summarized"""
+        return {cust: self._customer_entry(data) for cust, data in self.customer_ranking().top(n, 'total_spent')}
+
+    def daily_trend(self):
+        """Same result as daily_sales_trend()"""
+        daily = {}
+        for date, data in self.daily.items():
+            daily[date] = {
+                'revenue': round(data['revenue'], 2),
+                'transaction_count': data['transaction_count'],
+                'unique_customers': len(data['unique_customers'])
+            }
+        return dict(sorted(daily.items()))
+
+    def daily_series(self):
+        """DailySeries over the daily totals: O(log days) date-range totals, rolling windows, week/month rollups"""
+        return DailySeries(self.daily_trend())
+
+    def results(self, top_n=5, low_threshold=10):
+        """
+        Builds the results bundle consumed by generate_sales_report
+        Returns: dict with every analytic, computed from the running totals
+        """
+        daily = self.daily_trend()
+        peak_day = None
+        if daily:
+            date, data = max(daily.items(), key=lambda x: x[1]['revenue'])
+            peak_day = (date, data['revenue'], data['transaction_count'])
+
+        return {
+            'total_revenue': round(self.total_revenue, 2),
+            'transaction_count': self.transaction_count,
+            'date_range': (self.first_date, self.last_date) if self.transaction_count else None,
+            'region_sales': self.region_sales(),
+            'top_products': self.top_products(top_n),
+            'top_customers': self.top_customers(top_n),
+            'daily_trend': daily,
+            'peak_day': peak_day,
+            'low_products': self.low_products(low_threshold)
+        }
+
+class ApproxSalesAggregator(SalesAggregator):
+    """
+    Bounded-memory variant of SalesAggregator (opt-in, see analyze_sales(approximate=True))
+    Results are exact until more than `exact_limit` distinct customers (or products) are seen;
+    from then on that dimension switches to a sketch:
+    - customers: Space-Saving on total spent, `capacity` tracked - top customers are
+      overcounted by at most total revenue / capacity (purchase counts likewise)
+    - per-day unique customers: HyperLogLog, ~1.04 / sqrt(2^precision) relative error
+      (1.6% at precision 12, 4 KB per day) instead of a set of customer IDs per day
+    - products: Space-Saving on quantity; low_products() is then unavailable (None)
+    results()['approximate'] states which fields were approximated and their error bounds
+    """
+
+    def __init__(self, exact_limit=50000, capacity=10000, precision=12):
+        super().__init__()
+        self.exact_limit = exact_limit
+        self.capacity = capacity
+        self.precision = precision
+        self.customer_sketch = None  # SpaceSaving once customers exceed exact_limit
+        self.product_sketch = None   # SpaceSaving once products exceed exact_limit
+
+    def _add_product(self, name, qty, amount):
+        if self.product_sketch is not None:
+            self.product_sketch.add(name, qty, amount)
+            return
+        super()._add_product(name, qty, amount)
+        if len(self.products) > self.exact_limit:
+            self._spill_products()
+
+    def _add_customer(self, cust, amount, name):
+        if self.customer_sketch is not None:
+            self.customer_sketch.add(cust, amount, 1)
+            return
+        super()._add_customer(cust, amount, name)
+        if len(self.customers) > self.exact_limit:
+            self._spill_customers()
+
+    def _new_day_customers(self):
+        return set() if self.customer_sketch is None else HyperLogLog(self.precision)
+
+    def _spill_customers(self):
+        """Exact customer totals → Space-Saving, per-day customer sets → HyperLogLog"""
+        counts = {cust: (data['total_spent'], data['purchase_count']) for cust, data in self.customers.items()}
+        self.customer_sketch = SpaceSaving.from_counts(counts, self.capacity)
+        self.customers = {}
+        for day in self.daily.values():
+            day['unique_customers'] = HyperLogLog(self.precision).update(day['unique_customers'])
+
+    def _spill_products(self):
+        counts = {name: (data['total_qty'], data['total_revenue']) for name, data in self.products.items()}
+        self.product_sketch = SpaceSaving.from_counts(counts, self.capacity)
+        self.products = {}
+
+    def _merge_products(self, other):
+        other_sketch = getattr(other, 'product_sketch', None)
+        if self.product_sketch is None and other_sketch is None:
+            super()._merge_products(other)
+            if len(self.products) > self.exact_limit:
+                self._spill_products()
+            return
+        if self.product_sketch is None:
+            self._spill_products()
+        if other_sketch is None:
+            other_sketch = SpaceSaving.from_counts(
+                {name: (data['total_qty'], data['total_revenue']) for name, data in other.products.items()},
+                self.capacity)
+        self.product_sketch.merge(other_sketch)
+
+    def _merge_customers(self, other):
+        other_sketch = getattr(other, 'customer_sketch', None)
+        if self.customer_sketch is None and other_sketch is None:
+            super()._merge_customers(other)
+            if len(self.customers) > self.exact_limit:
+                self._spill_customers()
+            return
+        if self.customer_sketch is None:
+            self._spill_customers()
+        if other_sketch is None:
+            other_sketch = SpaceSaving.from_counts(
+                {cust: (data['total_spent'], data['purchase_count']) for cust, data in other.customers.items()},
+                self.capacity)
+        self.customer_sketch.merge(other_sketch)
+
+    def _merge_daily(self, other):
+        if self.customer_sketch is None:
+            super()._merge_daily(other)  # Both sides still hold exact sets
+            return
+        for date, data in other.daily.items():
+            mine = self.daily.setdefault(date, {'revenue': 0.0, 'transaction_count': 0,
+                                                'unique_customers': HyperLogLog(self.precision)})
+            mine['revenue'] += data['revenue']
+            mine['transaction_count'] += data['transaction_count']
+            theirs = data['unique_customers']
+            if isinstance(theirs, HyperLogLog):
+                mine['unique_customers'].merge(theirs)
+            else:
+                mine['unique_customers'].update(theirs)
+
+    def to_state(self):
+        if self.customer_sketch is not None or self.product_sketch is not None:
+            raise ValueError("Approximate aggregates cannot be saved as incremental state")
+        return super().to_state()
+
+    # ---------- Result views ----------
+    def top_products(self, n=5):
+        if self.product_sketch is None:
+            return super().top_products(n)
+        return [(name, qty, round(revenue, 2)) for name, qty, _, revenue, _ in self.product_sketch.top(n)]
+
+    def low_products(self, threshold=10):
+        if self.product_sketch is None:
+            return super().low_products(threshold)
+        return None  # A heavy-hitter sketch cannot enumerate the rarest products
+
+    def customer_summary(self):
+        """Exact customer_analysis() shape; sketched entries have products_bought=None"""
+        if self.customer_sketch is None:
+            return super().customer_summary()
+        return {cust: {'total_spent': spent,
+                       'purchase_count': count,
+                       'products_bought': None,
+                       'avg_order_value': round(spent / count, 2)}
+                for cust, spent, _, count, _ in self.customer_sketch.top()}
+
+    def top_customers(self, n=5):
+        if self.customer_sketch is None:
+            return super().top_customers(n)
+        return dict(list(self.customer_summary().items())[:n])
+
+    def approximation(self):
+        """Error bounds of the approximated fields - empty while everything is exact"""
+        info = {}
+        if self.customer_sketch is not None:
+            sketch = self.customer_sketch
+            info['customers'] = {'tracked': len(sketch), 'capacity': sketch.capacity,
+                                 'max_overcount': round(sketch.max_error(), 2),
+                                 'bound': round(sketch.total / sketch.capacity, 2)}
+            info['daily_unique_customers'] = {'relative_error': round(1.04 / (1 << self.precision) ** 0.5, 4)}
+        if self.product_sketch is not None:
+            sketch = self.product_sketch
+            info['products'] = {'tracked': len(sketch), 'capacity': sketch.capacity,
+                                'max_overcount': sketch.max_error(),
+                                'bound': round(sketch.total / sketch.capacity, 2)}
+        return info
+
+    def results(self, top_n=5, low_threshold=10):
+        results = super().results(top_n, low_threshold)
+        info = self.approximation()
+        if info:
+            results['approximate'] = info
+        return results
+
+BACKENDS = ['python', 'numpy']
+
+def analyze_sales(transactions, top_n=5, low_threshold=10, backend='python', approximate=False):
+    """
+    One-pass replacement for calling every data_processor analytic separately
+    backend='numpy' runs the vectorized implementation (needs NumPy)
+    approximate=True bounds memory with sketches on high-cardinality inputs (see ApproxSalesAggregator)
+    """
+    if approximate:
+        if backend != 'python':
+            raise ValueError("Approximate mode is only available with the python backend")
+        return ApproxSalesAggregator().update(transactions).results(top_n, low_threshold)
+    if backend == 'numpy':
+        from utils import vectorized
+        return vectorized.analyze_sales(transactions, top_n, low_threshold)
+    if backend != 'python':
+        raise ValueError(f"Unknown backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    return SalesAggregator().update(transactions).results(top_n, low_threshold)
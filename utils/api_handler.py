@@ -1,32 +1,273 @@
-import requests
 import json
 import os
 import re
+import threading
+import time
+from itertools import chain
+from utils.file_handler import EnrichedDataWriter, ENRICHED_HEADER
 
-def fetch_all_products():
-    """Fetches products from API or local file"""
+# requests (+ urllib3, charset_normalizer, certifi: ~100 ms) is imported on first network use,
+# so runs served from the catalog cache or the local products.json never load it
+
+CATALOG_URL = 'https://dummyjson.com/products?limit=100'
+CATALOG_PAGES_URL = 'https://dummyjson.com/products'
+CATALOG_FIELDS = 'id,title,category,brand,rating'  # All create_product_mapping needs
+CATALOG_FILE = 'data/products.json'
+CACHE_FILE = 'data/.products_cache.json'
+CACHE_TTL = 6 * 60 * 60  # Seconds a cached catalog is served without revalidation
+REVALIDATE_EXIT_WAIT = 15  # Seconds wait_for_revalidation() lets a background refresh finish at exit
+PRODUCT_ID_PATTERN = re.compile(r'P(\d+)')
+
+_session = None
+_revalidations = []  # Background catalog refresh threads started by fetch_all_products
+
+def get_session():
+    """Shared requests.Session - keeps TCP/TLS connections pooled between calls"""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+def load_catalog_cache(cache_file=CACHE_FILE):
+    """Cached catalog {'fetched_at', 'etag', 'last_modified', 'products'} or None"""
     try:
-        # Try API first
-        url = 'https://dummyjson.com/products?limit=100'
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        print(f"✅ Fetched {len(data['products'])} products from API")
-        return data['products']
-    except:
-        # Fallback to local file
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache.get('products'), list) else None
+    except (OSError, ValueError):
+        return None
+
+def save_catalog_cache(cache, cache_file=CACHE_FILE):
+    """Writes the cache atomically so a concurrent reader never sees half a file"""
+    directory = os.path.dirname(cache_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, cache_file)
+
+def _store_catalog_cache(cache, cache_file):
+    """save_catalog_cache for freshly fetched products - a failed write only costs the next run a fetch"""
+    try:
+        save_catalog_cache(cache, cache_file)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"\n⚠️ Could not write catalog cache {cache_file}: {e}")
+
+def _conditional_headers(cache):
+    """If-None-Match / If-Modified-Since from the cached validators"""
+    headers = {}
+    if cache:
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+    return headers
+
+def _refresh_cached(cache, cache_file):
+    """304 Not Modified: the cached products are fresh again"""
+    cache['fetched_at'] = time.time()
+    if cache_file:
+        _store_catalog_cache(cache, cache_file)
+    return cache['products']
+
+def revalidate_catalog(url=CATALOG_URL, cache=None, cache_file=CACHE_FILE, timeout=10):
+    """
+    Conditional GET using the cached ETag / Last-Modified
+    304 → cached products are refreshed in place, 200 → cache is replaced
+    Returns: product list (raises on network/HTTP errors)
+    """
+    response = get_session().get(url, headers=_conditional_headers(cache), timeout=timeout)
+    if response.status_code == 304 and cache:
+        return _refresh_cached(cache, cache_file)
+
+    response.raise_for_status()
+    products = response.json()['products']
+    if not cache_file:
+        return products
+    _store_catalog_cache({
+        'url': url,
+        'fetched_at': time.time(),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'products': products
+    }, cache_file)
+    return products
+
+def _get_catalog_page(url, skip, limit, timeout=10, retries=3, backoff=0.5, headers=None):
+    """
+    One catalog page - retried with exponential backoff on errors, 429 and 5xx
+    Returns: (page JSON - None for a 304 to conditional `headers`, response)
+    """
+    import requests
+    params = {'limit': limit, 'skip': skip, 'select': CATALOG_FIELDS}
+    for attempt in range(retries + 1):
         try:
-            with open('data/products.json', 'r') as f:
-                data = json.load(f)
-                print(f"✅ Loaded {len(data['products'])} products from file")
-                return data['products']
-        except Exception as e:
-            print(f"❌ No products: {e}")
-            return []
+            response = get_session().get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            response.raise_for_status()
+            if response.status_code == 304:
+                return None, response
+            return response.json(), response
+        except (requests.RequestException, ValueError):
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
 
-def create_product_mapping(api_products):
-    """ID → product info mapping"""
-    mapping = {}
+def iter_catalog_pages(url=CATALOG_PAGES_URL, page_size=100, max_workers=8, timeout=10, retries=3, backoff=0.5,
+                       first=None):
+    """
+    Fetches the whole catalog using the API's total/skip/limit fields
+    The first page gives `total`; the rest are fetched concurrently (at most
+    max_workers requests in flight) and yielded as they complete
+    first: page-0 JSON already fetched (e.g. by a conditional request) - not requested again
+    Yields: list of products per page
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    started = time.perf_counter()
+    if first is None:
+        # Only one retry on the first page so a dead endpoint fails fast
+        first, _ = _get_catalog_page(url, 0, page_size, timeout, min(retries, 1), backoff)
+    yield first['products']
+
+    # The server may cap limit - step by what it actually returned
+    step = len(first['products'])
+    total = first.get('total', step)
+    fetched, pages = step, 1
+    if step:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='catalog-page') as pool:
+            futures = [pool.submit(_get_catalog_page, url, skip, step, timeout, retries, backoff)
+                       for skip in range(step, total, step)]
+            for future in as_completed(futures):
+                products = future.result()[0]['products']
+                fetched += len(products)
+                pages += 1
+                yield products
+
+    elapsed = time.perf_counter() - started
+    rate = fetched / elapsed if elapsed else 0
+    print(f"✅ Fetched {fetched}/{total} products in {pages} pages ({elapsed:.2f}s, {rate:,.0f} products/s)")
+
+def iter_catalog_products(url=CATALOG_PAGES_URL, **options):
+    """Flattens iter_catalog_pages - pass straight to create_product_mapping"""
+    for page in iter_catalog_pages(url, **options):
+        yield from page
+
+def _fetch_catalog(url, cache, cache_file, timeout, paginate, on_page=None):
+    """
+    Single conditional request, or the full paginated catalog
+    Paginated: page 0 is requested conditionally with the cached validators - 304 keeps the cached
+    catalog without walking the other pages, 200 fetches them and caches page 0's ETag / Last-Modified
+    on_page(products, page) is called as each page arrives; `products` is the list being returned
+    """
+    if not paginate:
+        return revalidate_catalog(url, cache, cache_file, timeout)
+
+    pages_url = url.split('?')[0]
+    first, response = _get_catalog_page(pages_url, 0, 100, timeout, retries=1, headers=_conditional_headers(cache))
+    if first is None:
+        if not cache:
+            raise ValueError("304 Not Modified without a cached catalog")
+        return _refresh_cached(cache, cache_file)
+
+    products = []
+    for page in iter_catalog_pages(pages_url, timeout=timeout, first=first):
+        products.extend(page)
+        if on_page is not None:
+            on_page(products, page)
+    if cache_file:
+        _store_catalog_cache({'url': url, 'paginated': True, 'fetched_at': time.time(),
+                              'etag': response.headers.get('ETag'),
+                              'last_modified': response.headers.get('Last-Modified'),
+                              'products': products}, cache_file)
+    return products
+
+def _load_local_catalog(catalog_file=CATALOG_FILE):
+    try:
+        with open(catalog_file, 'r') as f:
+            data = json.load(f)
+            print(f"✅ Loaded {len(data['products'])} products from file")
+            return data['products']
+    except Exception as e:
+        print(f"❌ No products: {e}")
+        return []
+
+def _revalidate_quietly(url, cache, cache_file, timeout, paginate):
+    try:
+        _fetch_catalog(url, cache, cache_file, timeout, paginate)
+    except Exception:
+        pass  # Keep serving the stale copy; the next run retries
+
+def wait_for_revalidation(timeout=REVALIDATE_EXIT_WAIT):
+    """
+    Joins background catalog refreshes, waiting at most `timeout` seconds in total
+    Call before the process exits - the threads are daemons and would otherwise be killed mid-refresh
+    Returns: True if every refresh finished
+    """
+    deadline = time.monotonic() + timeout
+    while _revalidations:
+        thread = _revalidations.pop()
+        thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            return False
+    return True
+
+def fetch_all_products(url=CATALOG_URL, cache_file=CACHE_FILE, ttl=CACHE_TTL, timeout=10,
+                       stale_while_revalidate=True, paginate=False, offline=False, local_fallback=True, on_page=None):
+    """
+    Fetches products from cache, API or local file
+    - fresh cache (younger than ttl): served with no network round trip
+    - stale cache: served immediately while a background thread revalidates - call
+      wait_for_revalidation() before exiting (or revalidated inline when stale_while_revalidate=False)
+    - paginate=True fetches every page of the catalog, not just the first 100
+    - no cache / API down: local data/products.json
+    - offline=True never touches the network (cache of any age, else the local file)
+    - local_fallback=False returns None instead of reading the local file (see load_product_mapping)
+    - on_page(products, page): called per page of a paginated API fetch (see _fetch_catalog)
+    """
+    cache = load_catalog_cache(cache_file) if cache_file else None
+    if cache and (cache.get('url') != url or cache.get('paginated', False) != paginate):
+        cache = None
+
+    if offline:
+        if cache:
+            print(f"✅ Loaded {len(cache['products'])} products from cache (offline)")
+            return cache['products']
+        return _load_local_catalog() if local_fallback else None
+
+    if cache:
+        age = time.time() - cache.get('fetched_at', 0)
+        if age < ttl:
+            print(f"✅ Loaded {len(cache['products'])} products from cache")
+            return cache['products']
+        if stale_while_revalidate:
+            # Daemon, joined (bounded) by wait_for_revalidation once the run's work is done
+            thread = threading.Thread(target=_revalidate_quietly, args=(url, cache, cache_file, timeout, paginate),
+                                      name='catalog-revalidate', daemon=True)
+            thread.start()
+            _revalidations.append(thread)
+            print(f"✅ Loaded {len(cache['products'])} products from cache (revalidating)")
+            return cache['products']
+
+    try:
+        # Try API (conditional when we hold a stale copy)
+        products = _fetch_catalog(url, cache, cache_file, timeout, paginate, on_page)
+        print(f"✅ Fetched {len(products)} products from API")
+        return products
+    except Exception:
+        if cache:
+            print(f"✅ Loaded {len(cache['products'])} products from stale cache (API unavailable)")
+            return cache['products']
+        # Fallback to local file
+        return _load_local_catalog() if local_fallback else None
+
+def _add_to_mapping(mapping, api_products):
     for p in api_products:
         mapping[p['id']] = {
             'title': p['title'],
@@ -34,9 +275,49 @@ def create_product_mapping(api_products):
             'brand': p.get('brand', 'Unknown'),
             'rating': p['rating']
         }
+    return mapping
+
+def create_product_mapping(api_products):
+    """ID → product info mapping"""
+    mapping = _add_to_mapping({}, api_products)
     print(f"✅ Created mapping for {len(mapping)} products")
     return mapping
 
+def load_product_mapping(url=CATALOG_URL, catalog_file=CATALOG_FILE, paginate=False, offline=False, **options):
+    """
+    Product mapping for enrichment: create_product_mapping(fetch_all_products(...)), except that the
+    local fallback is the compiled, memory-mapped index of catalog_file (utils.catalog_index) -
+    recompiled only when the JSON changes, and only the ProductIDs looked up are decoded
+    A paginated API fetch is mapped page by page while the remaining pages are still in flight
+    If the index cannot be written (e.g. read-only data directory) the JSON is mapped in memory instead
+    Returns: dict or CatalogIndex (both support get / in / len)
+    """
+    streamed = {'products': None, 'mapping': {}}
+
+    def map_page(products, page):
+        streamed['products'] = products
+        _add_to_mapping(streamed['mapping'], page)
+
+    products = fetch_all_products(url, paginate=paginate, offline=offline, local_fallback=False,
+                                  on_page=map_page, **options)
+    if products is not None and products is streamed['products']:  # The streamed fetch completed
+        print(f"✅ Created mapping for {len(streamed['mapping'])} products")
+        return streamed['mapping']
+    if products is not None:
+        return create_product_mapping(products)
+
+    from utils.catalog_index import load_catalog_index
+    try:
+        index = load_catalog_index(catalog_file)
+    except OSError as e:
+        print(f"\n⚠️ Could not use compiled catalog for {catalog_file}: {e}")
+        return create_product_mapping(_load_local_catalog(catalog_file))
+    except Exception as e:
+        print(f"❌ No products: {e}")
+        return {}
+    print(f"✅ Loaded {len(index)} products from compiled catalog")
+    return index
+
 def extract_product_id(product_id_str):
     """Extract numeric ID from ProductID like 'P101' → 101"""
     # Handle dict/list input - get string value first
@@ -46,13 +327,83 @@ def extract_product_id(product_id_str):
     if not isinstance(product_id_str, str):
         product_id_str = str(product_id_str)
     
-    import re
-    match = re.search(r'P(\d+)', product_id_str)
+    match = PRODUCT_ID_PATTERN.search(product_id_str)
+    return int(match.group(1)) if match else None
+
+def catalog_id(product_id):
+    """ProductID → catalog ID used for enrichment (P101 → 101, P1234 → 1234), None if unusable"""
+    match = PRODUCT_ID_PATTERN.search(str(product_id))
     return int(match.group(1)) if match else None
 
-def enrich_sales_data(transactions, product_mapping):
-    """Enrich transactions - handles ALL data types bulletproof"""
-    enriched = []
+NO_MATCH = {'API_Category': None, 'API_Brand': None, 'API_Rating': None, 'API_Match': False}
+
+class ProductResolver:
+    """
+    Resolves each distinct ProductID string once and memoizes the result,
+    so enrichment costs one dict lookup per row
+    """
+
+    def __init__(self, product_mapping):
+        self.product_mapping = product_mapping
+        self._fields = {}  # ProductID → API_* fields to merge into the row
+
+    def enrichment(self, product_id):
+        """API_* fields for a ProductID (NO_MATCH when not in the catalog)"""
+        try:
+            return self._fields[product_id]
+        except KeyError:
+            pass
+        except TypeError:  # Unhashable input - resolve by its string form
+            product_id = str(product_id)
+            if product_id in self._fields:
+                return self._fields[product_id]
+
+        prod_id = catalog_id(product_id)
+        api_data = self.product_mapping.get(prod_id) if prod_id else None
+        if api_data is None:
+            fields = NO_MATCH
+        else:
+            fields = {
+                'API_Category': api_data.get('category'),
+                'API_Brand': api_data.get('brand', 'Unknown'),
+                'API_Rating': api_data.get('rating'),
+                'API_Match': True
+            }
+        self._fields[product_id] = fields
+        return fields
+
+    def is_match(self, product_id):
+        return self.enrichment(product_id)['API_Match']
+
+    def __len__(self):
+        return len(self._fields)
+
+def summarize_enrichment_counts(product_id_counts, product_mapping=None, is_match=None):
+    """
+    Enrichment summary from per-ProductID row counts (no enriched rows needed)
+    is_match: ProductID → bool, instead of resolving each ProductID against product_mapping
+    Returns: same shape as report_generator.summarize_enrichment
+    """
+    if is_match is None:
+        is_match = ProductResolver(product_mapping).is_match
+    enriched = total = unmatched_rows = 0
+    unmatched = []
+    for product_id, count in product_id_counts.items():
+        total += count
+        if is_match(product_id):
+            enriched += count
+        else:
+            unmatched_rows += count
+            if len(unmatched) < 10:
+                unmatched.append(product_id)
+    return {'enriched': enriched, 'total': total, 'unmatched': unmatched, 'truncated': unmatched_rows > 10}
+
+def iter_enriched(transactions, product_mapping):
+    """
+    Lazily enriches transactions - handles ALL data types bulletproof
+    Yields: enriched dicts (pair with save_enriched_data to stream to disk)
+    """
+    resolver = ProductResolver(product_mapping)
     
     for item in transactions:
         # Handle ANY input type
@@ -70,63 +421,37 @@ def enrich_sales_data(transactions, product_mapping):
         else:
             continue
         
-        # Extract ProductID safely
-        prod_id_str = str(t_dict.get('ProductID', ''))
-        prod_id = None
-        if 'P' in prod_id_str:
-            try:
-                # Extract number after P (P101 → 101)
-                num_str = ''.join(filter(str.isdigit, prod_id_str))
-                prod_id = int(num_str[:3]) if num_str else None
-            except:
-                prod_id = None
-        
-        # Enrich with API data
-        if prod_id and prod_id in product_mapping:
-            api_data = product_mapping[prod_id]
-            t_dict.update({
-                'API_Category': api_data.get('category'),
-                'API_Brand': api_data.get('brand', 'Unknown'),
-                'API_Rating': api_data.get('rating'),
-                'API_Match': True
-            })
-        else:
-            t_dict.update({
-                'API_Category': None,
-                'API_Brand': None,
-                'API_Rating': None,
-                'API_Match': False
-            })
-        
-        enriched.append(t_dict)
-    
+        # Enrich with API data (resolved once per distinct ProductID)
+        t_dict.update(resolver.enrichment(t_dict.get('ProductID', '')))
+        yield t_dict
+
+def enrich_sales_data(transactions, product_mapping, output_file=None):
+    """
+    Enrich transactions into a list
+    Saving is separate (save_enriched_data); pass output_file to also save here
+    """
+    enriched = list(iter_enriched(transactions, product_mapping))
     print(f"✅ Enriched {len(enriched)} transactions (input had {len(transactions)} items)")
-    save_enriched_data(enriched)
+    if output_file:
+        save_enriched_data(enriched, output_file)
     return enriched
 
 
 
-def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
-    """Save enriched data to pipe-delimited file"""
-    if not enriched_transactions:
+def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt', compression=None):
+    """
+    Save enriched data to pipe-delimited file (buffered, batched writes)
+    Accepts a list or a stream (e.g. iter_enriched); .gz/.zst names are compressed
+    Returns: number of rows written
+    """
+    rows = iter(enriched_transactions)
+    first = next(rows, None)
+    if first is None:
         print("❌ No data to save")
-        return
+        return 0
     
-    # Header
-    header = ['TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity', 
-              'UnitPrice', 'CustomerID', 'Region', 'API_Category', 
-              'API_Brand', 'API_Rating', 'API_Match']
-    
-    with open(filename, 'w') as f:
-        f.write('|'.join(header) + '\n')
-        
-        for t in enriched_transactions:
-            row = []
-            for field in header:
-                value = t.get(field, '')
-                if value is None:
-                    value = ''
-                row.append(str(value))
-            f.write('|'.join(row) + '\n')
+    with EnrichedDataWriter(filename, ENRICHED_HEADER, compression) as writer:
+        writer.write_rows(chain([first], rows))
     
     print(f"✅ Saved enriched data to {filename}")
+    return writer.count
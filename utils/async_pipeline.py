@@ -0,0 +1,95 @@
+import asyncio
+import time
+from itertools import islice
+
+from utils.file_handler import iter_sales_data, EnrichedDataWriter
+from utils.data_processor import iter_transactions, is_valid_transaction, passes_filters
+from utils.aggregator import SalesAggregator, ApproxSalesAggregator
+from utils.api_handler import load_product_mapping, iter_enriched
+from utils.parallel import FILTER_KEYS
+
+BATCH_SIZE = 10000
+
+def iter_batches(iterable, size=BATCH_SIZE):
+    """Lists of up to `size` items from any iterable"""
+    items = iter(iterable)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+def default_catalog():
+    """Product mapping from the (cached) paginated catalog - runs in a worker thread"""
+    return load_product_mapping(paginate=True)
+
+async def _timed(awaitable, stats, key):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        stats[key] = time.perf_counter() - start
+
+async def _ingest(filename, targets, enrich_filter, queue, stats, batch_size):
+    """Parse → validate → aggregate for every spec, one batch at a time; rows to enrich go to the queue"""
+    for batch in iter_batches(iter_transactions(iter_sales_data(filename)), batch_size):
+        stats['parsed'] += len(batch)
+        valid = [t for t in batch if is_valid_transaction(t)]
+        stats['invalid'] += len(batch) - len(valid)
+        for args, aggregator in targets:
+            aggregator.update(t for t in valid if passes_filters(t, *args))
+        if enrich_filter is not None:
+            queue.put_nowait([t for t in valid if passes_filters(t, *enrich_filter)])
+        else:
+            queue.put_nowait(valid)
+        await asyncio.sleep(0)  # Let the enrich stage run between batches
+    queue.put_nowait(None)
+
+async def _enrich(catalog, queue, writer, stats):
+    """Waits for the product mapping, then enriches (and writes) batches as they arrive"""
+    product_mapping = await catalog
+    while True:
+        batch = await queue.get()
+        if batch is None:
+            return product_mapping
+        enriched = list(iter_enriched(batch, product_mapping))
+        stats['enriched'] += len(enriched)
+        stats['matched'] += sum(1 for t in enriched if t['API_Match'])
+        if writer is not None:
+            await asyncio.to_thread(writer.write_rows, enriched)  # File I/O overlaps the next parse batch
+
+async def run_pipeline_async(filename, specs=({},), load_catalog=default_catalog, enriched_output=None,
+                             approximate=False, batch_size=BATCH_SIZE):
+    """
+    Overlapped pipeline: the catalog fetch runs in a thread from the start while the file is
+    parsed, validated and aggregated batch by batch; enrichment consumes the same batches as
+    soon as the mapping is ready and streams them to enriched_output
+    End-to-end time is roughly the slowest stage instead of the sum of all of them
+    Batches parsed before the catalog arrives wait in memory (all of them if the fetch is slower
+    than ingestion - as much as the sequential pipeline keeps)
+    Enriched rows: the single spec's rows, or every valid row when there are several specs
+    Returns: (list of SalesAggregator - one per spec, product_mapping, stats dict)
+    """
+    aggregator_class = ApproxSalesAggregator if approximate else SalesAggregator
+    aggregators = [aggregator_class() for _ in specs]
+    targets = [([spec.get(key) for key in FILTER_KEYS], aggregator) for spec, aggregator in zip(specs, aggregators)]
+    enrich_filter = targets[0][0] if len(specs) == 1 else None
+    stats = {'parsed': 0, 'invalid': 0, 'enriched': 0, 'matched': 0}
+
+    started = time.perf_counter()
+    queue = asyncio.Queue()  # Unbounded: ingestion never waits for a slow catalog
+    writer = EnrichedDataWriter(enriched_output) if enriched_output else None
+    try:
+        catalog = asyncio.create_task(_timed(asyncio.to_thread(load_catalog), stats, 'catalog_seconds'))
+        _, product_mapping = await asyncio.gather(
+            _timed(_ingest(filename, targets, enrich_filter, queue, stats, batch_size), stats, 'ingest_seconds'),
+            _enrich(catalog, queue, writer, stats))
+    finally:
+        if writer is not None:
+            writer.close()
+    stats['total_seconds'] = time.perf_counter() - started
+    return aggregators, product_mapping, stats
+
+def analyze_async(filename, specs=({},), **options):
+    """Synchronous entry point for run_pipeline_async (same arguments and result)"""
+    return asyncio.run(run_pipeline_async(filename, specs, **options))
@@ -0,0 +1,123 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from utils.table_cache import source_signature, matches_source, write_columns, read_header, column_view
+
+# File layout: table_cache.write_columns framing with three blocks
+# - ids: sorted int64 catalog IDs (bisected in place from the mmap)
+# - offsets / data: one compact JSON record [title, category, brand, rating] per ID, decoded on lookup
+MAGIC = b'SALESCAT'
+INDEX_VERSION = 1
+
+def default_index_file(source):
+    """data/products.json → data/.products.json.cat"""
+    directory, name = os.path.split(source)
+    return os.path.join(directory, f'.{name}.cat')
+
+def compile_catalog(source, index_file=None):
+    """
+    Extracts id/title/category/brand/rating from a catalog JSON file ({'products': [...]} or a list)
+    into a compact sorted index (atomic: temp file + rename)
+    Same fields and defaults as create_product_mapping; a repeated id keeps its last entry
+    Returns: number of products indexed
+    """
+    index_file = index_file or default_index_file(source)
+    signature = source_signature(source)
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    products = data['products'] if isinstance(data, dict) else data
+
+    records = {}
+    for p in products:
+        if isinstance(p.get('id'), int):
+            records[p['id']] = [p['title'], p['category'], p.get('brand', 'Unknown'), p['rating']]
+
+    ids = array('q', sorted(records))
+    offsets = array('Q', [0])
+    blob = bytearray()
+    for product_id in ids:
+        blob += json.dumps(records[product_id], separators=(',', ':')).encode('utf-8')
+        offsets.append(len(blob))
+
+    write_columns(index_file, MAGIC, INDEX_VERSION, {'count': len(ids), 'source': signature},
+                  [('ids', ids), ('offsets', offsets), ('data', blob)])
+    return len(ids)
+
+class CatalogIndex:
+    """
+    Memory-mapped product catalog - a drop-in for the create_product_mapping dict where
+    enrichment only needs get() / `in` / len(): a lookup is a bisect over the mapped IDs
+    plus one small JSON decode, so only the ProductIDs present in the sales data are ever read
+    """
+
+    def __init__(self, buffer, header):
+        self.ids = column_view(buffer, header, 'ids')
+        self.offsets = column_view(buffer, header, 'offsets')
+        self.data = column_view(buffer, header, 'data')
+        if len(self.ids) != header['count'] or len(self.offsets) != len(self.ids) + 1:
+            raise ValueError("Truncated catalog index")
+
+    def _position(self, product_id):
+        if not isinstance(product_id, int):
+            return None
+        i = bisect_left(self.ids, product_id)
+        return i if i < len(self.ids) and self.ids[i] == product_id else None
+
+    def get(self, product_id, default=None):
+        """Same entry create_product_mapping builds: {'title', 'category', 'brand', 'rating'}"""
+        i = self._position(product_id)
+        if i is None:
+            return default
+        title, category, brand, rating = json.loads(bytes(self.data[self.offsets[i]:self.offsets[i + 1]]))
+        return {'title': title, 'category': category, 'brand': brand, 'rating': rating}
+
+    def __getitem__(self, product_id):
+        entry = self.get(product_id)
+        if entry is None:
+            raise KeyError(product_id)
+        return entry
+
+    def __contains__(self, product_id):
+        return self._position(product_id) is not None
+
+    def __len__(self):
+        return len(self.ids)
+
+def open_index(index_file, source=None):
+    """
+    Maps a compiled catalog index
+    Returns: CatalogIndex, or None if missing, unreadable or stale against `source`
+    """
+    try:
+        f = open(index_file, 'rb')
+    except OSError:
+        return None
+    with f:
+        try:
+            header = read_header(f, MAGIC, INDEX_VERSION)
+            if header is None:
+                return None
+            if source is not None and (not os.path.exists(source) or not matches_source(header['source'], source)):
+                return None
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            return CatalogIndex(buffer, header)
+        except (struct.error, ValueError, KeyError, OSError):
+            return None
+
+def load_catalog_index(source, index_file=None):
+    """
+    Compiled index for a catalog JSON file - (re)compiled when missing or when the JSON changed
+    Returns: CatalogIndex (raises OSError / ValueError if the JSON itself cannot be read)
+    """
+    index_file = index_file or default_index_file(source)
+    index = open_index(index_file, source)
+    if index is None:
+        compile_catalog(source, index_file)
+        index = open_index(index_file, source)
+        if index is None:
+            raise ValueError(f"Could not open compiled catalog {index_file}")
+    return index
@@ -0,0 +1,326 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+
+# Memory target: <= 64 bytes per row (measured ~640 bytes per row for the
+# 8-key dicts built by parse_transactions). Per row the table stores:
+#   Quantity 8 B + UnitPrice 8 B + 5 dictionary codes x 4 B
+#   + TransactionID bytes + 8 B offset   → ~48 B for IDs like 'T001'
+# Distinct Date/ProductID/ProductName/CustomerID/Region values are stored once.
+ENCODED_COLUMNS = ['Date', 'ProductID', 'ProductName', 'CustomerID', 'Region']
+COLUMNS = ['TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity',
+           'UnitPrice', 'CustomerID', 'Region']
+
+class StringPool:
+    """Dictionary encoding: each distinct string is stored once and gets an int code"""
+
+    def __init__(self):
+        self.values = []   # code → string
+        self.codes = {}    # string → code
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+class PackedStrings:
+    """Unique strings (TransactionID) packed into one buffer plus an offsets array"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('Q', [0])
+
+    def append(self, value):
+        self.data += value.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], 'utf-8')  # bytearray or mmap view
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+class TransactionTable:
+    """
+    Columnar, array-backed store for parsed transactions
+    Iterating yields the same dicts parse_transactions builds (created on the fly)
+    so every list-of-dicts function in utils/ also accepts a table
+    """
+
+    def __init__(self, pools=None):
+        self.transaction_ids = PackedStrings()
+        self.quantity = array('q')
+        self.unit_price = array('d')
+        # Derived tables (take/filter) share the pools - only the codes are copied
+        self.pools = pools if pools is not None else {col: StringPool() for col in ENCODED_COLUMNS}
+        self.codes = {col: array('I') for col in ENCODED_COLUMNS}
+        self._amounts = None
+        self._index = None
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """Builds a table from any iterable of transaction dicts (list or stream)"""
+        table = cls()
+        append = table.append
+        for t in transactions:
+            append(t)
+        return table
+
+    def append(self, t):
+        """Adds one transaction dict"""
+        self.transaction_ids.append(t['TransactionID'])
+        self.quantity.append(t['Quantity'])
+        self.unit_price.append(t['UnitPrice'])
+        for col in ENCODED_COLUMNS:
+            self.codes[col].append(self.pools[col].encode(t[col]))
+        self._amounts = None
+        self._index = None
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def row(self, i):
+        """Materializes row i as a transaction dict"""
+        pools, codes = self.pools, self.codes
+        return {
+            'TransactionID': self.transaction_ids[i],
+            'Date': pools['Date'].values[codes['Date'][i]],
+            'ProductID': pools['ProductID'].values[codes['ProductID'][i]],
+            'ProductName': pools['ProductName'].values[codes['ProductName'][i]],
+            'Quantity': self.quantity[i],
+            'UnitPrice': self.unit_price[i],
+            'CustomerID': pools['CustomerID'].values[codes['CustomerID'][i]],
+            'Region': pools['Region'].values[codes['Region'][i]]
+        }
+
+    def __iter__(self):
+        row = self.row
+        for i in range(len(self)):
+            yield row(i)
+
+    def column(self, name):
+        """Decoded values of one column as a list"""
+        if name == 'TransactionID':
+            return [self.transaction_ids[i] for i in range(len(self))]
+        if name == 'Quantity':
+            return list(self.quantity)
+        if name == 'UnitPrice':
+            return list(self.unit_price)
+        values = self.pools[name].values
+        return [values[code] for code in self.codes[name]]
+
+    def distinct(self, name):
+        """Distinct values of an encoded column that occur in this table"""
+        values = self.pools[name].values
+        return [values[code] for code in sorted(set(self.codes[name]))]
+
+    def value_counts(self, name):
+        """Rows per distinct value of an encoded column, in first-seen order"""
+        counts = {}
+        for code in self.codes[name]:
+            counts[code] = counts.get(code, 0) + 1
+        values = self.pools[name].values
+        return {values[code]: count for code, count in counts.items()}
+
+    def amounts(self):
+        """Quantity * UnitPrice per row - computed once and cached"""
+        if self._amounts is None:
+            self._amounts = array('d', [q * p for q, p in zip(self.quantity, self.unit_price)])
+        return self._amounts
+
+    def take(self, indices):
+        """New table with the given rows (shares the string pools)"""
+        table = TransactionTable(self.pools)
+        for i in indices:
+            table.transaction_ids.append(self.transaction_ids[i])
+        table.quantity = array('q', [self.quantity[i] for i in indices])
+        table.unit_price = array('d', [self.unit_price[i] for i in indices])
+        for col in ENCODED_COLUMNS:
+            codes = self.codes[col]
+            table.codes[col] = array('I', [codes[i] for i in indices])
+        return table
+
+    def index(self):
+        """Validation bitmap + region/amount/date indexes - built once, dropped on append"""
+        if self._index is None:
+            self._index = TableIndex(self)
+        return self._index
+
+    def valid_rows(self, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+        """
+        Column-wise equivalent of the validate_and_filter row checks
+        Answered from the cached TableIndex, so repeated filters never rescan the rows
+        Returns: (list of row indices that pass, invalid_count)
+        """
+        index = self.index()
+        return index.select(region, min_amount, max_amount, start_date, end_date), index.invalid_count
+
+    def nbytes(self):
+        """Approximate memory held by the per-row columns"""
+        total = (len(self.transaction_ids.data) + self.transaction_ids.offsets.itemsize * len(self.transaction_ids.offsets)
+                 + self.quantity.itemsize * len(self.quantity)
+                 + self.unit_price.itemsize * len(self.unit_price))
+        for codes in self.codes.values():
+            total += codes.itemsize * len(codes)
+        return total
+
+class TableIndex:
+    """
+    Per-table filter indexes (see TransactionTable.index)
+    - valid: bitmap of rows passing the validation checks (computed once)
+    - region → valid row ids, valid rows sorted by amount (bisect range queries),
+      valid rows grouped by date in date order (bisect on the sorted dates)
+    The three indexes are built lazily on the first query that needs them
+    (1 B/row bitmap + up to ~20 B per valid row once all three exist)
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.valid, self.invalid_count = self._validate()
+        self._valid_rows = None
+        self._regions = None
+        self._amount_rows = self._amount_keys = None
+        self._date_rows = self._date_keys = self._date_offsets = None
+        self._region_values = self._amount_range = None
+
+    def regions(self):
+        """Distinct Region values of all rows (valid or not)"""
+        if self._region_values is None:
+            self._region_values = self.table.distinct('Region')
+        return self._region_values
+
+    def amount_range(self):
+        """(min, max) amount over all rows"""
+        if self._amount_range is None:
+            amounts = self.table.amounts()
+            self._amount_range = (min(amounts), max(amounts))
+        return self._amount_range
+
+    def _validate(self):
+        """ID/region checks run once per distinct value, not once per row"""
+        table = self.table
+
+        def good_codes(col, prefix):
+            return [bool(v) and v.startswith(prefix) for v in table.pools[col].values]
+
+        good_product = good_codes('ProductID', 'P')
+        good_customer = good_codes('CustomerID', 'C')
+        good_region = good_codes('Region', '')
+
+        ids = table.transaction_ids
+        id_data, id_offsets = ids.data, ids.offsets
+        t_byte = ord('T')
+        product_codes = table.codes['ProductID']
+        customer_codes = table.codes['CustomerID']
+        region_codes = table.codes['Region']
+        quantity, unit_price = table.quantity, table.unit_price
+
+        valid = bytearray(len(table))
+        invalid_count = 0
+        for i in range(len(table)):
+            start = id_offsets[i]
+            if (quantity[i] <= 0 or unit_price[i] <= 0 or
+                    start == id_offsets[i + 1] or id_data[start] != t_byte or
+                    not good_product[product_codes[i]] or
+                    not good_customer[customer_codes[i]] or
+                    not good_region[region_codes[i]]):
+                invalid_count += 1
+                continue
+            valid[i] = 1
+        return valid, invalid_count
+
+    def valid_rows(self):
+        """Ids of all valid rows, ascending"""
+        if self._valid_rows is None:
+            self._valid_rows = array('I', [i for i, ok in enumerate(self.valid) if ok])
+        return self._valid_rows
+
+    def region_rows(self, region):
+        """Valid row ids of one region, ascending"""
+        if self._regions is None:
+            region_codes = self.table.codes['Region']
+            groups = {}
+            for i in self.valid_rows():
+                code = region_codes[i]
+                rows = groups.get(code)
+                if rows is None:
+                    rows = groups[code] = array('I')
+                rows.append(i)
+            self._regions = groups
+        code = self.table.pools['Region'].codes.get(region)
+        return self._regions.get(code, array('I'))
+
+    def amount_rows(self, min_amount=None, max_amount=None):
+        """Valid row ids with min_amount <= amount <= max_amount (either bound optional), by amount"""
+        if self._amount_rows is None:
+            amounts = self.table.amounts()
+            self._amount_rows = array('I', sorted(self.valid_rows(), key=amounts.__getitem__))
+            self._amount_keys = array('d', [amounts[i] for i in self._amount_rows])
+        lo = bisect_left(self._amount_keys, min_amount) if min_amount else 0
+        hi = bisect_right(self._amount_keys, max_amount) if max_amount else len(self._amount_keys)
+        return self._amount_rows[lo:hi]
+
+    def date_rows(self, start_date=None, end_date=None):
+        """Valid row ids dated start_date..end_date (inclusive, YYYY-MM-DD), by date"""
+        if self._date_rows is None:
+            date_codes = self.table.codes['Date']
+            groups = {}
+            for i in self.valid_rows():
+                groups.setdefault(date_codes[i], []).append(i)
+            values = self.table.pools['Date'].values
+            ordered = sorted(groups, key=values.__getitem__)
+            self._date_keys = [values[code] for code in ordered]
+            self._date_rows = array('I')
+            self._date_offsets = array('Q', [0])
+            for code in ordered:
+                self._date_rows.extend(groups[code])
+                self._date_offsets.append(len(self._date_rows))
+        lo = bisect_left(self._date_keys, start_date) if start_date else 0
+        hi = bisect_right(self._date_keys, end_date) if end_date else len(self._date_keys)
+        return self._date_rows[self._date_offsets[lo]:self._date_offsets[hi]]
+
+    def select(self, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+        """
+        Valid row ids (ascending) matching every given filter - same semantics as passes_filters
+        The most selective index supplies the candidates, the other filters are checked per candidate
+        """
+        table = self.table
+        amounts = table.amounts()
+        dates, date_codes = table.pools['Date'].values, table.codes['Date']
+        region_code = table.pools['Region'].codes.get(region)
+        region_codes = table.codes['Region']
+
+        # filter name → (candidate rows from its index, per-row check)
+        filters = {}
+        if region:
+            filters['region'] = (self.region_rows(region), lambda i: region_codes[i] == region_code)
+        if min_amount or max_amount:
+            filters['amount'] = (self.amount_rows(min_amount, max_amount),
+                                 lambda i: not (min_amount and amounts[i] < min_amount) and
+                                 not (max_amount and amounts[i] > max_amount))
+        if start_date or end_date:
+            filters['date'] = (self.date_rows(start_date, end_date),
+                               lambda i: not (start_date and dates[date_codes[i]] < start_date) and
+                               not (end_date and dates[date_codes[i]] > end_date))
+        if not filters:
+            return list(self.valid_rows())
+
+        smallest = min(filters, key=lambda name: len(filters[name][0]))
+        candidates = filters.pop(smallest)[0]
+        checks = [check for _, check in filters.values()]
+        if checks:
+            candidates = [i for i in candidates if all(check(i) for check in checks)]
+        if smallest == 'region':
+            return list(candidates)  # Region lists are already in row order
+        if len(candidates) * 16 < len(self.valid):
+            return sorted(candidates)
+        # Large result: mark rows in a bitmap and read it back in row order (no O(k log k) sort)
+        mask = bytearray(len(self.valid))
+        for i in candidates:
+            mask[i] = 1
+        return list(compress(range(len(mask)), mask))
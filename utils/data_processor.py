@@ -1,87 +1,120 @@
-import re
+from utils.columnar import TransactionTable
+from utils.ranking import Ranking
+
+def parse_transaction_line(line):
+    """
+    Parses one raw line into a clean dictionary
+    Returns: transaction dict or None if the line is rejected
+    """
+    # Split by pipe |
+    fields = line.split('|')
+    if len(fields) < 8:  # Skip incorrect fields
+        return None
+
+    # Clean fields (plain str.replace - no regex per field)
+    trans_id, date, prod_id, prod_name, qty_str, unit_str, cust_id, region = fields[:8]
+
+    # Convert numbers ("1,500" → "1500"; int/float ignore surrounding whitespace like .strip())
+    try:
+        quantity = int(qty_str.replace(',', ''))
+        unit_price = float(unit_str.replace(',', ''))
+    except ValueError:
+        return None  # Skip invalid numbers
+
+    return {
+        'TransactionID': trans_id.strip(),
+        'Date': date.strip(),
+        'ProductID': prod_id.strip(),
+        'ProductName': prod_name.strip().replace(',', ' '),  # "Mouse, Wireless" → "Mouse Wireless"
+        'Quantity': quantity,  # int
+        'UnitPrice': unit_price,  # float
+        'CustomerID': cust_id.strip(),
+        'Region': region.strip()
+    }
+
+def iter_transactions(raw_lines):
+    """
+    Lazily parses raw lines (any iterable, e.g. iter_sales_data) into dictionaries
+    Yields: one clean transaction at a time - invalid lines are skipped
+    """
+    for line in raw_lines:
+        transaction = parse_transaction_line(line)
+        if transaction is not None:
+            yield transaction
 
 def parse_transactions(raw_lines):
     """
     Parses raw lines into clean list of dictionaries
     Handles commas in ProductName and numbers
     """
-    transactions = []
-    
-    for line in raw_lines:
-        # Split by pipe |
-        fields = line.split('|')
-        if len(fields) < 8:  # Skip incorrect fields
-            continue
-            
-        # Clean fields
-        trans_id = fields[0].strip()
-        date = fields[1].strip()
-        prod_id = fields[2].strip()
-        prod_name = re.sub(r',', ' ', fields[3].strip())  # "Mouse, Wireless" → "Mouse Wireless"
-        qty_str = re.sub(r',', '', fields[4].strip())    # "1,500" → "1500"
-        unit_str = re.sub(r',', '', fields[5].strip())
-        cust_id = fields[6].strip()
-        region = fields[7].strip()
-        
-        # Convert numbers
-        try:
-            quantity = int(qty_str)
-            unit_price = float(unit_str)
-        except:
-            continue  # Skip invalid numbers
-            
-        transaction = {
-            'TransactionID': trans_id,
-            'Date': date,
-            'ProductID': prod_id,
-            'ProductName': prod_name,
-            'Quantity': quantity,  # int
-            'UnitPrice': unit_price,  # float
-            'CustomerID': cust_id,
-            'Region': region
-        }
-        transactions.append(transaction)
-    
-    return transactions
+    return list(iter_transactions(raw_lines))
+
+def is_valid_transaction(t):
+    """Checks quantity/price are positive and IDs/region are well formed"""
+    return not (t['Quantity'] <= 0 or t['UnitPrice'] <= 0 or
+                not t['TransactionID'].startswith('T') or
+                not t['ProductID'].startswith('P') or
+                not t['CustomerID'].startswith('C') or
+                not t['Region'])
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def passes_filters(t, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+    """Checks optional region / amount / date-range (inclusive, YYYY-MM-DD) filters for one transaction"""
+    amount = t['Quantity'] * t['UnitPrice']
+    if region and t['Region'] != region:
+        return False
+    if min_amount and amount < min_amount:
+        return False
+    if max_amount and amount > max_amount:
+        return False
+    if start_date and t['Date'] < start_date:
+        return False
+    if end_date and t['Date'] > end_date:
+        return False
+    return True
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        start_date=None, end_date=None):
     """
     Validates transactions and applies optional filters
+    Accepts a list of dicts or a TransactionTable (then returns a TransactionTable)
     Returns: (valid_transactions, invalid_count, filter_summary)
     """
     valid_transactions = []
     invalid_count = 0
+    is_table = isinstance(transactions, TransactionTable)
+    index = transactions.index() if is_table else None  # Cached across calls on the same table
     
     # Print available regions
-    regions = set(t['Region'] for t in transactions)
+    if is_table:
+        regions = set(index.regions())
+    else:
+        regions = set(t['Region'] for t in transactions)
     print("Available regions:", ', '.join(regions))
     
     # Print amount range
-    amounts = [t['Quantity'] * t['UnitPrice'] for t in transactions]
-    print(f"Transaction amount range: {min(amounts):.2f} - {max(amounts):.2f}")
+    if is_table:
+        low, high = index.amount_range()
+    else:
+        amounts = [t['Quantity'] * t['UnitPrice'] for t in transactions]
+        low, high = min(amounts), max(amounts)
+    print(f"Transaction amount range: {low:.2f} - {high:.2f}")
     
-    for t in transactions:
-        amount = t['Quantity'] * t['UnitPrice']
-        
+    if is_table:
+        rows, invalid_count = transactions.valid_rows(region, min_amount, max_amount, start_date, end_date)
+        valid_transactions = transactions.take(rows)
+
+    for t in (() if is_table else transactions):
         # VALIDATION - skip invalid
-        if (t['Quantity'] <= 0 or t['UnitPrice'] <= 0 or
-            not t['TransactionID'].startswith('T') or
-            not t['ProductID'].startswith('P') or
-            not t['CustomerID'].startswith('C') or
-            not t['Region']):
+        if not is_valid_transaction(t):
             invalid_count += 1
             continue
-        
+
         # FILTERS
-        if region and t['Region'] != region:
-            continue
-        if min_amount and amount < min_amount:
-            continue
-        if max_amount and amount > max_amount:
+        if not passes_filters(t, region, min_amount, max_amount, start_date, end_date):
             continue
-            
+
         valid_transactions.append(t)
-    
+
     # Summary
     filter_summary = {
         'total_input': len(transactions),
@@ -121,8 +154,8 @@ def region_wise_sales(transactions):
     # Sort by total_sales DESC
     return dict(sorted(regions.items(), key=lambda x: x[1]['total_sales'], reverse=True))
 
-def top_selling_products(transactions, n=5):
-    """Top n products by total quantity sold"""
+def product_ranking(transactions):
+    """Groups quantity / revenue per product once - shared by the top and low product queries"""
     products = {}
     
     for t in transactions:
@@ -135,13 +168,17 @@ def top_selling_products(transactions, n=5):
         products[name]['total_qty'] += qty
         products[name]['total_revenue'] += revenue
     
-    # Convert to list of tuples, sort by qty DESC
-    product_list = [(name, data['total_qty'], round(data['total_revenue'], 2)) 
-                   for name, data in products.items()]
-    return sorted(product_list, key=lambda x: x[1], reverse=True)[:n]
+    return Ranking(products)
 
-def customer_analysis(transactions):
-    """Customer purchase patterns - sorted by total_spent DESC"""
+def _product_rows(ranked):
+    return [(name, data['total_qty'], round(data['total_revenue'], 2)) for name, data in ranked]
+
+def top_selling_products(transactions, n=5, ranking=None):
+    """Top n products by total quantity sold (heap selection - no full sort)"""
+    ranking = ranking or product_ranking(transactions)
+    return _product_rows(ranking.top(n, 'total_qty'))
+
+def _customer_totals(transactions):
     customers = {}
     
     for t in transactions:
@@ -158,15 +195,29 @@ def customer_analysis(transactions):
         customers[cust]['purchase_count'] += 1
         customers[cust]['products_bought'].add(t['ProductName'])
     
-    # Convert sets to lists and calculate avg
-    for cust in customers:
-        customers[cust]['avg_order_value'] = round(
-            customers[cust]['total_spent'] / customers[cust]['purchase_count'], 2
-        )
-        customers[cust]['products_bought'] = list(customers[cust]['products_bought'])
+    return customers
+
+def _customer_summary(data):
+    """Convert set to list and calculate avg"""
+    return {
+        'total_spent': data['total_spent'],
+        'purchase_count': data['purchase_count'],
+        'products_bought': list(data['products_bought']),
+        'avg_order_value': round(data['total_spent'] / data['purchase_count'], 2)
+    }
+
+def customer_analysis(transactions):
+    """Customer purchase patterns - sorted by total_spent DESC"""
+    customers = _customer_totals(transactions)
     
     # Sort by total_spent DESC
-    return dict(sorted(customers.items(), key=lambda x: x[1]['total_spent'], reverse=True))
+    ranked = sorted(customers.items(), key=lambda x: x[1]['total_spent'], reverse=True)
+    return {cust: _customer_summary(data) for cust, data in ranked}
+
+def top_customers(transactions, n=5):
+    """First n entries of customer_analysis() - heap selection, only n summaries built"""
+    ranked = Ranking(_customer_totals(transactions)).top(n, 'total_spent')
+    return {cust: _customer_summary(data) for cust, data in ranked}
 
 # ============= TASK 2.2 =============
 def daily_sales_trend(transactions):
@@ -191,29 +242,15 @@ def daily_sales_trend(transactions):
     # Sort chronologically
     return dict(sorted(daily.items()))
 
-def find_peak_sales_day(transactions):
-    """Find date with highest revenue"""
-    daily = daily_sales_trend(transactions)
+def find_peak_sales_day(transactions, daily=None):
+    """Find date with highest revenue (pass an existing daily_sales_trend() as `daily` to skip the rescan)"""
+    daily = daily if daily is not None else daily_sales_trend(transactions)
     peak_date = max(daily.items(), key=lambda x: x[1]['revenue'])
     date, data = peak_date
     return (date, data['revenue'], data['transaction_count'])
 
 # ============= TASK 2.3 =============
-def low_performing_products(transactions, threshold=10):
+def low_performing_products(transactions, threshold=10, ranking=None):
     """Products with total quantity < threshold - sorted ASC"""
-    products = {}
-    
-    for t in transactions:
-        name = t['ProductName']
-        qty = t['Quantity']
-        revenue = qty * t['UnitPrice']
-        
-        if name not in products:
-            products[name] = {'total_qty': 0, 'total_revenue': 0.0}
-        products[name]['total_qty'] += qty
-        products[name]['total_revenue'] += revenue
-    
-    # Filter low performers and sort ASC by quantity
-    low_performers = [(name, data['total_qty'], round(data['total_revenue'], 2))
-                     for name, data in products.items() if data['total_qty'] < threshold]
-    return sorted(low_performers, key=lambda x: x[1])
+    ranking = ranking or product_ranking(transactions)
+    return _product_rows(ranking.below(threshold, 'total_qty'))
@@ -1,23 +1,148 @@
+import gzip
+import os
+from itertools import islice
+from operator import itemgetter
+
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+SNIFF_SIZE = 64 * 1024         # Bytes inspected to guess the encoding
+CHUNK_SIZE = 1024 * 1024       # Read buffer for streaming large files
+WRITE_BATCH = 10000            # Rows formatted and written per write() call
+ENRICHED_HEADER = ['TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity',
+                   'UnitPrice', 'CustomerID', 'Region', 'API_Category',
+                   'API_Brand', 'API_Rating', 'API_Match']
+
+def detect_encoding(filename, sample_size=SNIFF_SIZE):
+    """
+    Guesses file encoding from a prefix of the file (read once)
+    Returns: encoding name or None - raises FileNotFoundError
+    """
+    with open(filename, 'rb') as f:
+        sample = f.read(sample_size)
+
+    for encoding in ENCODINGS:
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError as e:
+            # A multi-byte character cut off at the end of the sample is fine
+            if len(sample) == sample_size and e.reason == 'unexpected end of data':
+                return encoding
+            continue
+    return None
+
+def iter_sales_data(filename, chunk_size=CHUNK_SIZE):
+    """
+    Streams sales data one line at a time (constant memory)
+    Yields: raw lines (strings) - skips header & empty lines
+    """
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print(f"ERROR: File '{filename}' not found!")
+        return
+
+    if encoding is None:
+        print("ERROR: Could not read file with any encoding!")
+        return
+    print(f"Successfully read with encoding: {encoding}")
+
+    # errors='replace' - a bad byte past the sniffed prefix must not abort a half-consumed stream
+    with open(filename, 'r', encoding=encoding, errors='replace', buffering=chunk_size) as f:
+        next(f, None)  # Skip header
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues
     Returns: list of raw lines (strings) - skips header & empty lines
     """
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    
-    for encoding in encodings:
+    return list(iter_sales_data(filename))
+
+def open_output(filename, compression=None, buffer_size=CHUNK_SIZE):
+    """
+    Opens a text file for writing, optionally compressed
+    compression: None/'gzip'/'zstd' - inferred from a .gz / .zst suffix when None
+    """
+    if compression is None:
+        if filename.endswith('.gz'):
+            compression = 'gzip'
+        elif filename.endswith('.zst'):
+            compression = 'zstd'
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if compression == 'gzip':
+        return gzip.open(filename, 'wt', compresslevel=6, encoding='utf-8', newline='')
+    if compression == 'zstd':
         try:
-            with open(filename, 'r', encoding=encoding) as f:
-                lines = f.readlines()
-                # Skip header (first line) and empty lines
-                raw_lines = [line.strip() for line in lines[1:] if line.strip()]
-                print(f"Successfully read with encoding: {encoding}")
-                return raw_lines
-        except UnicodeDecodeError:
-            continue
-        except FileNotFoundError:
-            print(f"ERROR: File '{filename}' not found!")
-            return []
-    
-    print("ERROR: Could not read file with any encoding!")
-    return []
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd output needs the zstandard package: pip install zstandard")
+        return zstandard.open(filename, 'wt', encoding='utf-8', newline='')
+    if compression:
+        raise ValueError(f"Unknown compression '{compression}'")
+    return open(filename, 'w', encoding='utf-8', newline='', buffering=buffer_size)
+
+class EnrichedDataWriter:
+    """
+    Buffered pipe-delimited writer - rows are formatted a batch at a time and
+    each batch reaches the file in a single write()
+    Use as a context manager; `count` holds the rows written
+    """
+
+    def __init__(self, filename, header=ENRICHED_HEADER, compression=None, batch_size=WRITE_BATCH):
+        self.filename = filename
+        self.header = header
+        self.batch_size = batch_size
+        self.count = 0
+        self._batch = []
+        self._getter = itemgetter(*header)
+        self._file = open_output(filename, compression)
+        self._file.write('|'.join(header) + '\n')
+
+    def _format(self, batch):
+        """One string for a batch of dicts (missing/None fields become empty)"""
+        try:
+            records = [self._getter(t) for t in batch]
+        except KeyError:  # Some rows lack fields - fall back to .get()
+            records = [[t.get(field) for field in self.header] for t in batch]
+        return ''.join(['|'.join(['' if v is None else str(v) for v in record]) + '\n'
+                        for record in records])
+
+    def write(self, t):
+        """Queues one transaction dict"""
+        self._batch.append(t)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, transactions):
+        """Writes any iterable of dicts in batches (no per-row method calls)"""
+        self.flush()
+        rows = iter(transactions)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self._file.write(self._format(batch))
+            self.count += len(batch)
+
+    def flush(self):
+        if self._batch:
+            self._file.write(self._format(self._batch))
+            self.count += len(self._batch)
+            self._batch = []
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
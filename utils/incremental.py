@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+
+from utils.file_handler import detect_encoding
+from utils.aggregator import SalesAggregator
+from utils.parallel import aggregate_shard_specs, FILTER_KEYS
+
+STATE_VERSION = 1
+HASH_BLOCK = 1024 * 1024
+
+def _hash_range(digest, filename, start, end):
+    """Feeds bytes [start, end) of the file into a running hash - returns the digest"""
+    remaining = end - start
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        while remaining > 0:
+            block = f.read(min(HASH_BLOCK, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+def _new_digest():
+    # BLAKE2b of the processed prefix - detects edits to already-processed data
+    return hashlib.blake2b(digest_size=16)
+
+def _complete_length(filename, size):
+    """Offset just past the last newline - a half-written last line is left for the next run"""
+    with open(filename, 'rb') as f:
+        position = size
+        while position > 0:
+            start = max(position - HASH_BLOCK, 0)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                return start + newline + 1
+            position = start
+    return 0
+
+def _header_end(filename):
+    with open(filename, 'rb') as f:
+        f.readline()
+        return f.tell()
+
+def load_state(state_file):
+    """Reads persisted incremental state - None if missing or unreadable"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+def save_state(state_file, state):
+    """Writes state atomically (temp file + rename)"""
+    directory = os.path.dirname(state_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = state_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_file, state_file)
+
+def incremental_analyze(filename, state_file='data/.sales_state.json', region=None, min_amount=None, max_amount=None,
+                        start_date=None, end_date=None):
+    """
+    Aggregates only the lines appended since the last run
+    Falls back to a full rebuild if the processed prefix changed (checksum),
+    the file shrank, or the filters differ from the saved state
+    Returns: (SalesAggregator for the whole file, stats dict)
+    """
+    size = os.path.getsize(filename)
+    end = _complete_length(filename, size)
+    spec = {'region': region, 'min_amount': min_amount, 'max_amount': max_amount,
+            'start_date': start_date, 'end_date': end_date}
+    filters = [spec[key] for key in FILTER_KEYS]
+
+    state = load_state(state_file)
+    mode = 'full'
+    start = _header_end(filename)
+    aggregator = SalesAggregator()
+    totals = {'parsed': 0, 'invalid': 0}
+
+    digest = _new_digest()
+    if (state and state['source'] == os.path.abspath(filename) and state['filters'] == filters
+            and state['offset'] <= end
+            and _hash_range(digest, filename, 0, state['offset']).hexdigest() == state['checksum']):
+        mode = 'incremental'
+        start = state['offset']
+        aggregator = SalesAggregator.from_state(state['aggregate'])
+        totals = state['totals']
+    else:
+        if state:
+            print("⚠️  Saved state does not match the data file - rebuilding from scratch")
+        digest = _hash_range(_new_digest(), filename, 0, start)
+
+    encoding = (state or {}).get('encoding') if mode == 'incremental' else None
+    encoding = encoding or detect_encoding(filename) or 'utf-8'
+
+    new_records = 0
+    if end > start:
+        partials, shard_stats = aggregate_shard_specs(filename, start, end, encoding, [spec])
+        aggregator.merge(partials[0])
+        totals['parsed'] += shard_stats['parsed']
+        totals['invalid'] += shard_stats['invalid']
+        new_records = shard_stats['parsed']
+
+    save_state(state_file, {
+        'version': STATE_VERSION,
+        'source': os.path.abspath(filename),
+        'encoding': encoding,
+        'filters': filters,
+        'offset': max(end, start),
+        'checksum': _hash_range(digest, filename, start, end).hexdigest(),
+        'totals': totals,
+        'aggregate': aggregator.to_state()
+    })
+
+    print(f"✅ {mode.capitalize()} run: {new_records} new records, {aggregator.transaction_count} total")
+    return aggregator, {'mode': mode, 'new_records': new_records, **totals}
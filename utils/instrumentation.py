@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import sys
+import time
+
+# cProfile / tracemalloc (~6 ms with their pickle/linecache imports) load only when enabled
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far - None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _prometheus_label(value):
+    """Label value escaped per the text exposition format (backslash, quote, newline)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _profile_name(stage):
+    """Stage name as a safe file name for its .prof dump"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', stage)
+
+class StageRecord:
+    """Measurements for one pipeline stage - set rows_out inside the `with` block"""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_rss_bytes = None
+        self.tracemalloc_delta_bytes = None
+        self.tracemalloc_peak_bytes = None
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'wall_s': self.wall_s,
+            'cpu_s': self.cpu_s,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'tracemalloc_delta_bytes': self.tracemalloc_delta_bytes,
+            'tracemalloc_peak_bytes': self.tracemalloc_peak_bytes
+        }
+
+class _NoopStage:
+    """Shared do-nothing stage used when instrumentation is disabled"""
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass  # Discard rows_out etc.
+
+_NOOP_STAGE = _NoopStage()
+
+class _Stage:
+    def __init__(self, owner, record):
+        self.owner = owner
+        self.record = record
+        self.profiler = None
+
+    def __enter__(self):
+        owner = self.owner
+        if owner.trace_memory:
+            import tracemalloc
+            tracemalloc.reset_peak()
+            self._mem_start = tracemalloc.get_traced_memory()[0]
+        if owner.profile_dir:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exc_info):
+        record = self.record
+        record.wall_s = round(time.perf_counter() - self._wall, 6)
+        record.cpu_s = round(time.process_time() - self._cpu, 6)
+        if self.profiler:
+            self.profiler.disable()
+            self.profiler.dump_stats(os.path.join(self.owner.profile_dir, f"{_profile_name(record.name)}.prof"))
+        if self.owner.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            record.tracemalloc_delta_bytes = current - self._mem_start
+            record.tracemalloc_peak_bytes = peak
+        record.peak_rss_bytes = peak_rss_bytes()
+        self.owner.records.append(record)
+        self.owner._emit(record)
+        return False
+
+class Instrumentation:
+    """
+    Per-stage wall time, CPU time, peak RSS, tracemalloc delta and row counts
+    - metrics_file ending in .prom: Prometheus text file written by close()
+      anything else: one JSON line per stage, appended as stages finish
+    - profile_dir: one cProfile dump per stage (<stage>.prof)
+    When disabled, stage() returns a shared no-op context manager
+    """
+
+    def __init__(self, enabled=False, metrics_file=None, profile_dir=None, trace_memory=False, run_id=None):
+        self.enabled = enabled or bool(metrics_file or profile_dir or trace_memory)
+        self.metrics_file = metrics_file
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory and self.enabled
+        self.run_id = run_id or time.strftime('%Y%m%dT%H%M%S')
+        self.records = []
+        self._started_tracemalloc = False
+
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+
+    def stage(self, name, rows_in=None):
+        """Context manager measuring one stage: `with inst.stage('parse', n) as s: ... s.rows_out = m`"""
+        if not self.enabled:
+            return _NOOP_STAGE
+        return _Stage(self, StageRecord(name, rows_in))
+
+    def _is_prometheus(self):
+        return bool(self.metrics_file) and self.metrics_file.endswith('.prom')
+
+    def _emit(self, record):
+        if not self.metrics_file or self._is_prometheus():
+            return
+        directory = os.path.dirname(self.metrics_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.metrics_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'run_id': self.run_id, **record.as_dict()}) + '\n')
+
+    def prometheus_text(self):
+        """Stage metrics in Prometheus text exposition format"""
+        metrics = [
+            ('sales_stage_wall_seconds', 'gauge', 'Wall-clock time per pipeline stage', 'wall_s'),
+            ('sales_stage_cpu_seconds', 'gauge', 'CPU time per pipeline stage', 'cpu_s'),
+            ('sales_stage_rows_in', 'gauge', 'Rows entering the stage', 'rows_in'),
+            ('sales_stage_rows_out', 'gauge', 'Rows leaving the stage', 'rows_out'),
+            ('sales_stage_peak_rss_bytes', 'gauge', 'Process peak RSS after the stage', 'peak_rss_bytes'),
+            ('sales_stage_tracemalloc_delta_bytes', 'gauge', 'Traced memory retained by the stage',
+             'tracemalloc_delta_bytes'),
+        ]
+        lines = []
+        for metric, kind, help_text, field in metrics:
+            samples = [(r.name, getattr(r, field)) for r in self.records if getattr(r, field) is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for stage, value in samples:
+                lines.append(f'{metric}{{stage="{_prometheus_label(stage)}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        """Writes the Prometheus file (if any) and stops tracemalloc if we started it"""
+        if self._is_prometheus() and self.records:
+            directory = os.path.dirname(self.metrics_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_file = self.metrics_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_file, self.metrics_file)
+        if self._started_tracemalloc:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def summary(self):
+        """One line per stage, slowest first"""
+        lines = []
+        for r in sorted(self.records, key=lambda r: r.wall_s or 0, reverse=True):
+            rows = f"{r.rows_in if r.rows_in is not None else '-'} → {r.rows_out if r.rows_out is not None else '-'}"
+            lines.append(f"   {r.name:<20} {r.wall_s:>9.3f}s wall {r.cpu_s:>9.3f}s cpu   rows {rows}")
+        return '\n'.join(lines)
@@ -0,0 +1,105 @@
+import os
+
+from utils.file_handler import detect_encoding
+from utils.data_processor import parse_transaction_line, is_valid_transaction, passes_filters
+from utils.aggregator import SalesAggregator, ApproxSalesAggregator
+
+def split_file(filename, shards):
+    """
+    Splits a sales file into byte ranges that start and end on line boundaries
+    Returns: list of (start, end) offsets - the header line is excluded
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        f.readline()  # Skip header
+        data_start = f.tell()
+        step = max((size - data_start) // max(shards, 1), 1)
+
+        bounds = [data_start]
+        while bounds[-1] < size and len(bounds) < shards:
+            f.seek(bounds[-1] + step)
+            f.readline()  # Move to the start of the next full line
+            offset = min(f.tell(), size)
+            if offset <= bounds[-1]:
+                break
+            bounds.append(offset)
+        if bounds[-1] < size:
+            bounds.append(size)
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+FILTER_KEYS = ['region', 'min_amount', 'max_amount', 'start_date', 'end_date']
+
+def _filter_args(spec):
+    return [spec.get(key) for key in FILTER_KEYS]
+
+def aggregate_shard_specs(filename, start, end, encoding='utf-8', specs=({},), approximate=False):
+    """
+    Parses and validates one byte range once, aggregating it for several filter specs
+    specs: dicts with optional region / min_amount / max_amount / start_date / end_date
+    approximate: use ApproxSalesAggregator (bounded memory on high-cardinality data)
+    Returns: (list of SalesAggregator - one per spec, stats dict with parsed / invalid counts)
+    """
+    filters = [_filter_args(spec) for spec in specs]
+    aggregator_class = ApproxSalesAggregator if approximate else SalesAggregator
+    aggregators = [aggregator_class() for _ in specs]
+    targets = list(zip(filters, aggregators))
+    stats = {'lines': 0, 'parsed': 0, 'invalid': 0}
+
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        while f.tell() < end:
+            raw = f.readline()
+            if not raw:
+                break
+            line = raw.decode(encoding, errors='replace').strip()
+            if not line:
+                continue
+            stats['lines'] += 1
+            t = parse_transaction_line(line)
+            if t is None:
+                continue
+            stats['parsed'] += 1
+            if not is_valid_transaction(t):
+                stats['invalid'] += 1
+                continue
+            for args, aggregator in targets:
+                if passes_filters(t, *args):
+                    aggregator.add(t)
+
+    return aggregators, stats
+
+def _aggregate_shard_args(args):
+    return aggregate_shard_specs(*args)
+
+def parallel_analyze_specs(filename, specs, workers=None, approximate=False):
+    """
+    Sharded, multi-process parse + aggregation of a sales file for several filter specs
+    The file is parsed once; every spec gets its own merged aggregator
+    Partials are merged in file order, so results match SalesAggregator over the
+    whole file (float sums may differ in the last bit from a sequential sum)
+    Returns: (list of merged SalesAggregator, combined stats)
+    """
+    workers = workers or os.cpu_count() or 1
+    encoding = detect_encoding(filename) or 'utf-8'
+    shards = split_file(filename, workers)
+    jobs = [(filename, start, end, encoding, list(specs), approximate) for start, end in shards]
+
+    if workers == 1 or len(jobs) <= 1:
+        partials = [aggregate_shard_specs(*job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # multiprocessing only when it is used
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_aggregate_shard_args, jobs))
+
+    aggregator_class = ApproxSalesAggregator if approximate else SalesAggregator
+    merged = [aggregator_class() for _ in specs]
+    stats = {'lines': 0, 'parsed': 0, 'invalid': 0, 'shards': len(jobs), 'workers': workers}
+    for aggregators, shard_stats in partials:
+        for total, partial in zip(merged, aggregators):
+            total.merge(partial)
+        for key in ('lines', 'parsed', 'invalid'):
+            stats[key] += shard_stats[key]
+
+    print(f"✅ Aggregated {stats['parsed']} records from {len(jobs)} shards with {workers} workers")
+    return merged, stats
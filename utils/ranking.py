@@ -0,0 +1,42 @@
+import heapq
+
+class Ranking:
+    """
+    Grouped totals (key → {field: total}) answering ranking queries without a full sort
+    - top(n, by) / bottom(n, by): heapq.nlargest / nsmallest, O(m log n); ties keep
+      first-seen order, exactly like sorted(...)[:n]
+    - below(threshold, by) / at_least(threshold, by): only the matching groups are sorted
+    Wrap an existing totals dict (e.g. SalesAggregator.products) or build one with add()
+    """
+
+    def __init__(self, totals=None):
+        self.totals = totals if totals is not None else {}
+
+    def add(self, key, **amounts):
+        """Adds amounts to one group's totals: ranking.add('Mouse', total_qty=2, total_revenue=900.0)"""
+        entry = self.totals.get(key)
+        if entry is None:
+            entry = self.totals[key] = dict.fromkeys(amounts, 0)
+        for field, amount in amounts.items():
+            entry[field] += amount
+
+    def top(self, n, by):
+        """n largest groups by field `by` - [(key, totals)] descending"""
+        return heapq.nlargest(n, self.totals.items(), key=lambda x: x[1][by])
+
+    def bottom(self, n, by):
+        """n smallest groups by field `by` - [(key, totals)] ascending"""
+        return heapq.nsmallest(n, self.totals.items(), key=lambda x: x[1][by])
+
+    def below(self, threshold, by):
+        """Groups with `by` < threshold - [(key, totals)] ascending"""
+        matches = [(key, data) for key, data in self.totals.items() if data[by] < threshold]
+        return sorted(matches, key=lambda x: x[1][by])
+
+    def at_least(self, threshold, by):
+        """Groups with `by` >= threshold - [(key, totals)] descending"""
+        matches = [(key, data) for key, data in self.totals.items() if data[by] >= threshold]
+        return sorted(matches, key=lambda x: x[1][by], reverse=True)
+
+    def __len__(self):
+        return len(self.totals)
@@ -1,116 +1,360 @@
-from utils.data_processor import calculate_total_revenue, region_wise_sales, top_selling_products, customer_analysis, daily_sales_trend, find_peak_sales_day, low_performing_products
+from utils.timeseries import DailySeries
 from datetime import datetime
+import csv
+import html
+import io
+import json
 import os
 
 def format_currency(amount):
     """Format number with commas: 1545000 → 1,545,000"""
     return f"₹{amount:,.2f}"
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
-    """Generates comprehensive formatted text report"""
-    
-    # Create output directory
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # 1. HEADER
-        f.write("=" * 55 + "\n")
-        f.write("           SALES ANALYTICS REPORT\n")
-        f.write(f"         Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"         Records Processed: {len(transactions)}\n")
-        f.write("=" * 55 + "\n\n")
-        
-        # 2. OVERALL SUMMARY
-        f.write("OVERALL SUMMARY\n")
-        f.write("-" * 55 + "\n")
-        total_revenue = calculate_total_revenue(transactions)
-        f.write(f"Total Revenue:        {format_currency(total_revenue)}\n")
-        f.write(f"Total Transactions:   {len(transactions)}\n")
-        avg_order = total_revenue / len(transactions) if transactions else 0
-        f.write(f"Average Order Value:  {format_currency(avg_order)}\n")
-        
-        dates = [t['Date'] for t in transactions]
-        date_range = f"{min(dates)} to {max(dates)}" if dates else "No data"
-        f.write(f"Date Range:           {date_range}\n\n")
-        
-        # 3. REGION-WISE PERFORMANCE
-        f.write("REGION-WISE PERFORMANCE\n")
-        f.write("-" * 55 + "\n")
-        f.write(f"{'Region':<12} {'Sales':<12} {'% of Total':<12} {'Transactions':<12}\n")
-        f.write("-" * 55 + "\n")
-        
-        regions = region_wise_sales(transactions)
-        for region, data in regions.items():
-            pct = data['percentage']
-            f.write(f"{region:<12} {format_currency(data['total_sales']):<12} "
-                   f"{pct:<12.1f}% {data['transaction_count']:<12}\n")
-        f.write("\n")
-        
-        # 4. TOP 5 PRODUCTS
-        f.write("TOP 5 PRODUCTS\n")
-        f.write("-" * 55 + "\n")
-        f.write(f"{'Rank':<5} {'Product Name':<20} {'Qty Sold':<10} {'Revenue':<15}\n")
-        f.write("-" * 55 + "\n")
-        
-        top_products = top_selling_products(transactions, n=5)
-        for i, (name, qty, revenue) in enumerate(top_products, 1):
-            f.write(f"{i:<5} {name:<20.19} {qty:<10} {format_currency(revenue):<15}\n")
-        f.write("\n")
-        
-        # 5. TOP 5 CUSTOMERS
-        f.write("TOP 5 CUSTOMERS\n")
-        f.write("-" * 55 + "\n")
-        f.write(f"{'Rank':<5} {'Customer ID':<12} {'Total Spent':<15} {'Order Count':<12}\n")
-        f.write("-" * 55 + "\n")
-        
-        customers = customer_analysis(transactions)
-        top_customers = list(customers.items())[:5]
-        for i, (cust_id, data) in enumerate(top_customers, 1):
-            f.write(f"{i:<5} {cust_id:<12} {format_currency(data['total_spent']):<15} "
-                   f"{data['purchase_count']:<12}\n")
-        f.write("\n")
-        
-        # 6. DAILY SALES TREND
-        f.write("DAILY SALES TREND\n")
-        f.write("-" * 55 + "\n")
-        f.write(f"{'Date':<12} {'Revenue':<15} {'Transactions':<12} {'Unique Cust':<12}\n")
-        f.write("-" * 55 + "\n")
-        
-        daily = daily_sales_trend(transactions)
-        for date, data in sorted(daily.items()):
-            f.write(f"{date:<12} {format_currency(data['revenue']):<15} "
-                   f"{data['transaction_count']:<12} {data['unique_customers']:<12}\n")
-        f.write("\n")
-        
-        # 7. PRODUCT PERFORMANCE ANALYSIS
-        f.write("PRODUCT PERFORMANCE ANALYSIS\n")
-        f.write("-" * 55 + "\n")
-        peak_day = find_peak_sales_day(transactions)
-        f.write(f"Best Selling Day: {peak_day[0]} (₹{peak_day[1]:,.2f}, {peak_day[2]} transactions)\n\n")
-        
-        low_products = low_performing_products(transactions, threshold=10)
-        if low_products:
-            f.write("Low Performing Products (<10 units):\n")
-            for name, qty, revenue in low_products:
-                f.write(f"  {name}: {qty} units, ₹{revenue:,.2f}\n")
-        else:
-            f.write("No low performing products\n")
-        f.write("\n")
-        
-        # 8. API ENRICHMENT SUMMARY
-        f.write("API ENRICHMENT SUMMARY\n")
-        f.write("-" * 55 + "\n")
-        enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match', False))
-        success_rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
-        f.write(f"Products Enriched:    {enriched_count}/{len(enriched_transactions)}\n")
-        f.write(f"Success Rate:         {success_rate:.1f}%\n")
-        
-        unmatched = [t['ProductID'] for t in enriched_transactions if not t.get('API_Match', False)]
-        if unmatched:
-            f.write(f"Unmatched Products:   {', '.join(set(unmatched[:10]))}{'...' if len(unmatched) > 10 else ''}\n")
-        f.write("\n")
-        
-        f.write("END OF REPORT\n")
-        f.write("=" * 55 + "\n")
-    
-    print(f"✅ Report generated: {output_file}")
+def summarize_enrichment(enriched_transactions):
+    """
+    API match counts for the report's enrichment section
+    Returns: {'enriched', 'total', 'unmatched' (IDs to show), 'truncated'}
+    """
+    enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match', False))
+    unmatched = [t['ProductID'] for t in enriched_transactions if not t.get('API_Match', False)]
+    return {
+        'enriched': enriched_count,
+        'total': len(enriched_transactions),
+        'unmatched': list(set(unmatched[:10])),
+        'truncated': len(unmatched) > 10
+    }
+
+# Report sections derived from the daily series - built only when a requested format outputs them
+SERIES_SECTIONS = ('peak_week', 'peak_month', 'weekly', 'monthly', 'rolling_7', 'rolling_30')
+
+def build_report(results, enrichment, top_n=5, low_threshold=10, sections=SERIES_SECTIONS):
+    """
+    One precomputed view of the analysis that every renderer formats
+    results: analyze_sales() / SalesAggregator.results() bundle
+    enrichment: summarize_enrichment() / summarize_enrichment_counts() summary
+    sections: which SERIES_SECTIONS to compute (see report_sections)
+    Returns: plain dict (JSON-serializable) - see RENDERERS
+    """
+    record_count = results['transaction_count']
+    total_revenue = results['total_revenue']
+    dates = results['date_range']
+    peak_day = results['peak_day']
+    low_products = results['low_products']
+    enriched_count, enriched_total = enrichment['enriched'], enrichment['total']
+    series = DailySeries(results['daily_trend']) if sections else None  # From the daily totals - no rescan
+
+    def periods(buckets):
+        return [{'period': key, **totals} for key, totals in buckets.items()]
+
+    def peak(period):
+        found = series.peak(period)
+        return {'period': found[0], 'revenue': found[1], 'transaction_count': found[2]} if found else None
+
+    derived = {
+        'peak_week': lambda: peak('week'),
+        'peak_month': lambda: peak('month'),
+        'weekly': lambda: periods(series.rollup('week')),
+        'monthly': lambda: periods(series.rollup('month')),
+        'rolling_7': lambda: periods(series.rolling(7)),
+        'rolling_30': lambda: periods(series.rolling(30)),
+    }
+
+    return {
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'record_count': record_count,
+        'total_revenue': total_revenue,
+        'average_order_value': total_revenue / record_count if record_count else 0,
+        'date_range': list(dates) if dates else None,
+        'approximate': results.get('approximate'),
+        'region_sales': [{'region': region, **data} for region, data in results['region_sales'].items()],
+        'top_n': top_n,
+        'top_products': [{'rank': i, 'name': name, 'quantity': qty, 'revenue': revenue}
+                         for i, (name, qty, revenue) in enumerate(results['top_products'][:top_n], 1)],
+        'top_customers': [{'rank': i, 'customer_id': cust_id, 'total_spent': data['total_spent'],
+                           'purchase_count': data['purchase_count'], 'avg_order_value': data['avg_order_value']}
+                          for i, (cust_id, data) in enumerate(list(results['top_customers'].items())[:top_n], 1)],
+        'daily_trend': [{'date': date, **data} for date, data in sorted(results['daily_trend'].items())],
+        'peak_day': ({'date': peak_day[0], 'revenue': peak_day[1], 'transaction_count': peak_day[2]}
+                     if peak_day else None),
+        **{section: derived[section]() for section in SERIES_SECTIONS if section in sections},
+        'low_threshold': low_threshold,
+        'low_products': (None if low_products is None else
+                         [{'name': name, 'quantity': qty, 'revenue': revenue} for name, qty, revenue in low_products]),
+        'enrichment': {
+            'enriched': enriched_count,
+            'total': enriched_total,
+            'success_rate': (enriched_count / enriched_total) * 100 if enriched_total else 0,
+            'unmatched': list(enrichment['unmatched']),
+            'truncated': enrichment['truncated']
+        }
+    }
+
+# ============= RENDERERS =============
+def render_text(report):
+    """The fixed-width text report (output/sales_report.txt)"""
+    out = []
+    record_count = report['record_count']
+    top_n = report['top_n']
+
+    # 1. HEADER
+    out.append("=" * 55 + "\n")
+    out.append("           SALES ANALYTICS REPORT\n")
+    out.append(f"         Generated: {report['generated']}\n")
+    out.append(f"         Records Processed: {record_count}\n")
+    out.append("=" * 55 + "\n\n")
+
+    # 2. OVERALL SUMMARY
+    out.append("OVERALL SUMMARY\n")
+    out.append("-" * 55 + "\n")
+    out.append(f"Total Revenue:        {format_currency(report['total_revenue'])}\n")
+    out.append(f"Total Transactions:   {record_count}\n")
+    out.append(f"Average Order Value:  {format_currency(report['average_order_value'])}\n")
+
+    dates = report['date_range']
+    date_range = f"{dates[0]} to {dates[1]}" if dates else "No data"
+    out.append(f"Date Range:           {date_range}\n")
+    if report['approximate']:
+        out.append(f"Accuracy:             Approximate ({', '.join(report['approximate'])})\n")
+    out.append("\n")
+
+    # 3. REGION-WISE PERFORMANCE
+    out.append("REGION-WISE PERFORMANCE\n")
+    out.append("-" * 55 + "\n")
+    out.append(f"{'Region':<12} {'Sales':<12} {'% of Total':<12} {'Transactions':<12}\n")
+    out.append("-" * 55 + "\n")
+    for row in report['region_sales']:
+        out.append(f"{row['region']:<12} {format_currency(row['total_sales']):<12} "
+                   f"{row['percentage']:<12.1f}% {row['transaction_count']:<12}\n")
+    out.append("\n")
+
+    # 4. TOP N PRODUCTS
+    out.append(f"TOP {top_n} PRODUCTS\n")
+    out.append("-" * 55 + "\n")
+    out.append(f"{'Rank':<5} {'Product Name':<20} {'Qty Sold':<10} {'Revenue':<15}\n")
+    out.append("-" * 55 + "\n")
+    for row in report['top_products']:
+        out.append(f"{row['rank']:<5} {row['name']:<20.19} {row['quantity']:<10} {format_currency(row['revenue']):<15}\n")
+    out.append("\n")
+
+    # 5. TOP N CUSTOMERS
+    out.append(f"TOP {top_n} CUSTOMERS\n")
+    out.append("-" * 55 + "\n")
+    out.append(f"{'Rank':<5} {'Customer ID':<12} {'Total Spent':<15} {'Order Count':<12}\n")
+    out.append("-" * 55 + "\n")
+    for row in report['top_customers']:
+        out.append(f"{row['rank']:<5} {row['customer_id']:<12} {format_currency(row['total_spent']):<15} "
+                   f"{row['purchase_count']:<12}\n")
+    out.append("\n")
+
+    # 6. DAILY SALES TREND
+    out.append("DAILY SALES TREND\n")
+    out.append("-" * 55 + "\n")
+    out.append(f"{'Date':<12} {'Revenue':<15} {'Transactions':<12} {'Unique Cust':<12}\n")
+    out.append("-" * 55 + "\n")
+    for row in report['daily_trend']:
+        out.append(f"{row['date']:<12} {format_currency(row['revenue']):<15} "
+                   f"{row['transaction_count']:<12} {row['unique_customers']:<12}\n")
+    out.append("\n")
+
+    # 7. PRODUCT PERFORMANCE ANALYSIS
+    out.append("PRODUCT PERFORMANCE ANALYSIS\n")
+    out.append("-" * 55 + "\n")
+    peak_day = report['peak_day']
+    if peak_day:
+        out.append(f"Best Selling Day: {peak_day['date']} (₹{peak_day['revenue']:,.2f}, "
+                   f"{peak_day['transaction_count']} transactions)\n")
+    else:
+        out.append("Best Selling Day: No data\n")
+    for label, peak in (('Week', report['peak_week']), ('Month', report['peak_month'])):
+        if peak:
+            out.append(f"Best Selling {label}: {peak['period']} (₹{peak['revenue']:,.2f}, "
+                       f"{peak['transaction_count']} transactions)\n")
+    out.append("\n")
+
+    low_products = report['low_products']
+    if low_products is None:
+        out.append("Low Performing Products: not tracked in approximate mode\n")
+    elif low_products:
+        out.append(f"Low Performing Products (<{report['low_threshold']} units):\n")
+        for row in low_products:
+            out.append(f"  {row['name']}: {row['quantity']} units, ₹{row['revenue']:,.2f}\n")
+    else:
+        out.append("No low performing products\n")
+    out.append("\n")
+
+    # 8. API ENRICHMENT SUMMARY
+    enrichment = report['enrichment']
+    out.append("API ENRICHMENT SUMMARY\n")
+    out.append("-" * 55 + "\n")
+    out.append(f"Products Enriched:    {enrichment['enriched']}/{enrichment['total']}\n")
+    out.append(f"Success Rate:         {enrichment['success_rate']:.1f}%\n")
+    if enrichment['unmatched']:
+        out.append(f"Unmatched Products:   {', '.join(enrichment['unmatched'])}{'...' if enrichment['truncated'] else ''}\n")
+    out.append("\n")
+
+    out.append("END OF REPORT\n")
+    out.append("=" * 55 + "\n")
+    return ''.join(out)
+
+def render_json(report):
+    """The report dict as indented JSON"""
+    return json.dumps(report, indent=2, ensure_ascii=False) + '\n'
+
+def _report_rows(report):
+    """(section, key, field, value) rows shared by the CSV renderer"""
+    rows = [('summary', '', field, report[field])
+            for field in ('generated', 'record_count', 'total_revenue', 'average_order_value')]
+    if report['date_range']:
+        rows += [('summary', '', 'first_date', report['date_range'][0]),
+                 ('summary', '', 'last_date', report['date_range'][1])]
+    sections = [('region', 'region', report['region_sales']),
+                ('top_product', 'name', report['top_products']),
+                ('top_customer', 'customer_id', report['top_customers']),
+                ('daily', 'date', report['daily_trend']),
+                ('low_product', 'name', report['low_products'] or []),
+                ('weekly', 'period', report['weekly']),
+                ('monthly', 'period', report['monthly'])]
+    for section, key_field, items in sections:
+        for item in items:
+            rows += [(section, item[key_field], field, value) for field, value in item.items() if field != key_field]
+    if report['peak_day']:
+        rows += [('peak_day', report['peak_day']['date'], field, value)
+                 for field, value in report['peak_day'].items() if field != 'date']
+    for section in ('peak_week', 'peak_month'):
+        if report[section]:
+            rows += [(section, report[section]['period'], field, value)
+                     for field, value in report[section].items() if field != 'period']
+    rows += [('enrichment', '', field, ';'.join(value) if isinstance(value, list) else value)
+             for field, value in report['enrichment'].items()]
+    return rows
+
+def render_csv(report):
+    """Long-format CSV: section,key,field,value (one metric per row)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(['section', 'key', 'field', 'value'])
+    writer.writerows(_report_rows(report))
+    return buffer.getvalue()
+
+def _html_table(headers, rows):
+    head = ''.join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = ''.join('<tr>' + ''.join(f"<td>{html.escape(str(v))}</td>" for v in row) + '</tr>\n' for row in rows)
+    return f"<table>\n<tr>{head}</tr>\n{body}</table>\n"
+
+def render_html(report):
+    """Self-contained HTML page with one table per report section"""
+    top_n = report['top_n']
+    enrichment = report['enrichment']
+    dates = report['date_range']
+    parts = [
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Sales Analytics Report</title>\n"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1.5em}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}</style></head><body>\n",
+        "<h1>Sales Analytics Report</h1>\n",
+        f"<p>Generated: {html.escape(report['generated'])} - Records Processed: {report['record_count']}</p>\n",
+        "<h2>Overall Summary</h2>\n",
+        _html_table(['Metric', 'Value'], [
+            ['Total Revenue', format_currency(report['total_revenue'])],
+            ['Total Transactions', report['record_count']],
+            ['Average Order Value', format_currency(report['average_order_value'])],
+            ['Date Range', f"{dates[0]} to {dates[1]}" if dates else "No data"]]
+            + ([['Accuracy', f"Approximate ({', '.join(report['approximate'])})"]] if report['approximate'] else [])),
+        "<h2>Region-wise Performance</h2>\n",
+        _html_table(['Region', 'Sales', '% of Total', 'Transactions'],
+                    [[r['region'], format_currency(r['total_sales']), f"{r['percentage']:.1f}%", r['transaction_count']]
+                     for r in report['region_sales']]),
+        f"<h2>Top {top_n} Products</h2>\n",
+        _html_table(['Rank', 'Product Name', 'Qty Sold', 'Revenue'],
+                    [[r['rank'], r['name'], r['quantity'], format_currency(r['revenue'])] for r in report['top_products']]),
+        f"<h2>Top {top_n} Customers</h2>\n",
+        _html_table(['Rank', 'Customer ID', 'Total Spent', 'Order Count'],
+                    [[r['rank'], r['customer_id'], format_currency(r['total_spent']), r['purchase_count']]
+                     for r in report['top_customers']]),
+        "<h2>Daily Sales Trend</h2>\n",
+        _html_table(['Date', 'Revenue', 'Transactions', 'Unique Cust'],
+                    [[r['date'], format_currency(r['revenue']), r['transaction_count'], r['unique_customers']]
+                     for r in report['daily_trend']]),
+        "<h2>Weekly Rollup</h2>\n",
+        _html_table(['Week', 'Revenue', 'Transactions'],
+                    [[r['period'], format_currency(r['revenue']), r['transaction_count']] for r in report['weekly']]),
+        "<h2>Monthly Rollup</h2>\n",
+        _html_table(['Month', 'Revenue', 'Transactions'],
+                    [[r['period'], format_currency(r['revenue']), r['transaction_count']] for r in report['monthly']]),
+        "<h2>Product Performance Analysis</h2>\n",
+    ]
+    peak_day = report['peak_day']
+    parts.append(f"<p>Best Selling Day: {html.escape(str(peak_day['date']))} ({format_currency(peak_day['revenue'])}, "
+                 f"{peak_day['transaction_count']} transactions)</p>\n" if peak_day else "<p>Best Selling Day: No data</p>\n")
+    for label, peak in (('Week', report['peak_week']), ('Month', report['peak_month'])):
+        if peak:
+            parts.append(f"<p>Best Selling {label}: {html.escape(str(peak['period']))} ({format_currency(peak['revenue'])}, "
+                         f"{peak['transaction_count']} transactions)</p>\n")
+    if report['low_products'] is None:
+        parts.append("<p>Low Performing Products: not tracked in approximate mode</p>\n")
+    elif report['low_products']:
+        parts.append(_html_table([f"Low Performing Products (<{report['low_threshold']} units)", 'Units', 'Revenue'],
+                                 [[r['name'], r['quantity'], format_currency(r['revenue'])] for r in report['low_products']]))
+    else:
+        parts.append("<p>No low performing products</p>\n")
+    parts.append("<h2>API Enrichment Summary</h2>\n")
+    parts.append(_html_table(['Metric', 'Value'], [
+        ['Products Enriched', f"{enrichment['enriched']}/{enrichment['total']}"],
+        ['Success Rate', f"{enrichment['success_rate']:.1f}%"],
+        ['Unmatched Products', ', '.join(enrichment['unmatched']) + ('...' if enrichment['truncated'] else '')]]))
+    parts.append("</body></html>\n")
+    return ''.join(parts)
+
+# Format → (renderer, file extension, SERIES_SECTIONS it outputs)
+RENDERERS = {
+    'text': (render_text, '.txt', ('peak_week', 'peak_month')),
+    'json': (render_json, '.json', SERIES_SECTIONS),
+    'csv': (render_csv, '.csv', ('peak_week', 'peak_month', 'weekly', 'monthly')),
+    'html': (render_html, '.html', ('peak_week', 'peak_month', 'weekly', 'monthly')),
+}
+
+def report_sections(formats):
+    """SERIES_SECTIONS needed by any of the formats (unknown formats are rejected by write_report)"""
+    return {section for fmt in formats if fmt in RENDERERS for section in RENDERERS[fmt][2]}
+
+def write_report(report, output_file, formats=('text',)):
+    """
+    Renders one precomputed report in every requested format
+    output_file is used as-is for text; other formats swap the extension
+    Returns: list of written files
+    """
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown report format(s) {', '.join(unknown)} (choose from {', '.join(RENDERERS)})")
+
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    root = os.path.splitext(output_file)[0]
+
+    written = []
+    for fmt in formats:
+        render, extension, _ = RENDERERS[fmt]
+        path = output_file if fmt == 'text' else root + extension
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render(report))
+        print(f"✅ Report generated: {path}")
+        written.append(path)
+    return written
+
+def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt',
+                          results=None, enrichment=None, formats=('text',), top_n=5, low_threshold=10):
+    """
+    Generates the sales report in one or more formats (text, json, csv, html)
+    Pass `results` from SalesAggregator.results() to skip re-analyzing transactions
+    and `enrichment` (see summarize_enrichment) to skip scanning enriched rows
+    All formats are rendered from the same build_report() computation, which derives only the
+    series sections (rollups, rolling windows) those formats output
+    Returns: list of written files
+    """
+    if results is None:
+        from utils.aggregator import analyze_sales  # Only when no precomputed results are passed
+        results = analyze_sales(transactions, top_n, low_threshold)
+    if enrichment is None:
+        enrichment = summarize_enrichment(enriched_transactions)
+    return write_report(build_report(results, enrichment, top_n, low_threshold, report_sections(formats)),
+                        output_file, formats)
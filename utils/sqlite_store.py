@@ -0,0 +1,338 @@
+import json
+import os
+import sqlite3
+
+from utils.api_handler import ProductResolver, summarize_enrichment_counts
+from utils.columnar import TransactionTable, ENCODED_COLUMNS
+from utils.table_cache import matches_source
+
+# Parsed rows are stored once with their validation flag, so validate + filter + analytics
+# become indexed SQL over the stored history - no reparse while the source file is unchanged
+SCHEMA_VERSION = 2
+LOAD_BATCH = 50000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    transaction_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    product_name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price REAL NOT NULL,
+    customer_id TEXT NOT NULL,
+    region TEXT NOT NULL,
+    amount REAL NOT NULL,
+    valid INTEGER NOT NULL
+);
+-- Catalog fields resolved once per distinct ProductID; `enriched` joins them to the valid rows
+CREATE TABLE IF NOT EXISTS enriched_products (
+    product_id TEXT PRIMARY KEY,
+    api_category TEXT,
+    api_brand TEXT,
+    api_rating REAL,
+    api_match INTEGER NOT NULL
+);
+CREATE VIEW IF NOT EXISTS enriched AS
+    SELECT t.id, t.transaction_id, t.product_id, p.api_category, p.api_brand, p.api_rating, p.api_match
+    FROM transactions t JOIN enriched_products p ON p.product_id = t.product_id WHERE t.valid = 1;
+"""
+
+# Created after a bulk load (building an index once is cheaper than maintaining it per insert)
+INDEXES = {
+    'idx_transactions_date': 'transactions (date)',
+    'idx_transactions_region': 'transactions (region)',
+    'idx_transactions_product': 'transactions (product_id)',
+    'idx_transactions_customer': 'transactions (customer_id)',
+}
+
+# One grouped query per analytic. At load time each is materialized over all valid rows
+# as agg_<name> (unfiltered questions read a few hundred rows instead of the history);
+# with filters the same query runs over the matching rows, copied once into a temp table
+# through the Date/Region indexes. first_id = first-seen order
+GROUPINGS = {
+    'summary': 'SELECT COALESCE(SUM(amount), 0.0) AS total_revenue, COUNT(*) AS transaction_count, '
+               'MIN(date) AS first_date, MAX(date) AS last_date FROM {source} {where}',
+    'regions': 'SELECT region, SUM(amount) AS total_sales, COUNT(*) AS transaction_count, MIN(id) AS first_id '
+               'FROM {source} {where} GROUP BY region',
+    'products': 'SELECT product_name, SUM(quantity) AS total_qty, SUM(amount) AS total_revenue, MIN(id) AS first_id '
+                'FROM {source} {where} GROUP BY product_name',
+    # product_name never contains ',' (the parser replaces it), so the concatenation splits cleanly
+    'customers': 'SELECT customer_id, SUM(amount) AS total_spent, COUNT(*) AS purchase_count, '
+                 'GROUP_CONCAT(DISTINCT product_name) AS products_bought, MIN(id) AS first_id '
+                 'FROM {source} {where} GROUP BY customer_id',
+    'daily': 'SELECT date, SUM(amount) AS revenue, COUNT(*) AS transaction_count, '
+             'COUNT(DISTINCT customer_id) AS unique_customers FROM {source} {where} GROUP BY date',
+    'product_ids': 'SELECT product_id, COUNT(*) AS row_count, MIN(id) AS first_id '
+                   'FROM {source} {where} GROUP BY product_id',
+}
+AGGREGATE_INDEXES = {
+    'idx_agg_customers_spent': 'agg_customers (total_spent DESC, first_id)',
+    'idx_agg_products_qty': 'agg_products (total_qty, first_id)',
+}
+
+class SalesStore:
+    """
+    Embedded SQLite database of parsed (and optionally enriched) transactions
+    - load_transactions(): one batched executemany inside a single transaction, then indexes
+    - load_enriched(): catalog fields per distinct ProductID - the `enriched` view holds them per row,
+      and later runs summarize enrichment without fetching the catalog
+    - aggregates: every grouping in GROUPINGS is materialized in the same transaction, so the
+      unfiltered report questions (top N, regions, daily trend) are answered in milliseconds
+    - analytics: the data_processor questions as SQL with the same result shapes
+      (ties keep first-seen order); filtered questions use the Date/Region/... indexes
+    - filters: region / min_amount / max_amount / start_date / end_date, as in validate_and_filter
+    Only valid rows are analyzed; invalid rows are kept so counts match the file
+    """
+
+    def __init__(self, db_file):
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_file = db_file
+        self._matched = None  # Filter (clause, params) currently copied into temp.matched
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        if self._meta('schema_version') not in (None, SCHEMA_VERSION):
+            self._reset()
+        if not self._has_table('agg_summary'):
+            with self.conn:
+                self._build_aggregates()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Loading ----------
+    def _meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+
+    def _has_table(self, name):
+        return self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                 (name,)).fetchone() is not None
+
+    def _reset(self):
+        """Drops every table and view except meta (schema upgrade) and recreates the schema"""
+        objects = self.conn.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view') "
+                                    "AND name NOT IN ('meta') AND name NOT LIKE 'sqlite_%'").fetchall()
+        self.conn.executescript(''.join(f'DROP {kind.upper()} IF EXISTS {name};' for kind, name in objects)
+                                + 'DELETE FROM meta;')
+        self.conn.executescript(SCHEMA)
+
+    def _build_aggregates(self):
+        """(Re)materializes agg_<name> for every grouping over all valid rows"""
+        for name, sql in GROUPINGS.items():
+            self.conn.execute(f'DROP TABLE IF EXISTS agg_{name}')
+            self.conn.execute(f'CREATE TABLE agg_{name} AS ' + sql.format(source='transactions', where='WHERE valid = 1'))
+        for name, target in AGGREGATE_INDEXES.items():
+            self.conn.execute(f'CREATE INDEX {name} ON {target}')
+
+    def is_fresh(self, source):
+        """True if the stored rows were loaded from this exact source file (size + mtime, else hash)"""
+        cached = self._meta('source')
+        return cached is not None and os.path.exists(source) and matches_source(cached, source)
+
+    def _drop_indexes(self, table):
+        for name, target in INDEXES.items():
+            if target.startswith(table + ' '):
+                self.conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+    def _create_indexes(self, table):
+        for name, target in INDEXES.items():
+            if target.startswith(table + ' '):
+                self.conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+    @staticmethod
+    def _table_rows(table):
+        """Row tuples straight from the columns (no per-row dicts)"""
+        index = table.index()
+        values = {col: table.pools[col].values for col in ENCODED_COLUMNS}
+        codes = table.codes
+        ids = table.transaction_ids
+        for i, (qty, price) in enumerate(zip(table.quantity, table.unit_price)):
+            yield (i, ids[i], values['Date'][codes['Date'][i]], values['ProductID'][codes['ProductID'][i]],
+                   values['ProductName'][codes['ProductName'][i]], qty, price,
+                   values['CustomerID'][codes['CustomerID'][i]], values['Region'][codes['Region'][i]],
+                   qty * price, index.valid[i])
+
+    def _insert(self, sql, rows, batch_size):
+        batch = []
+        count = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.conn.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.conn.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def load_transactions(self, transactions, signature=None, batch_size=LOAD_BATCH):
+        """
+        Replaces the stored rows with parsed transactions (TransactionTable or dicts)
+        Everything runs in one transaction: readers see either the old or the new history
+        signature: source_signature() of the input taken BEFORE it was read, recorded for is_fresh()
+        (a file that grew while being read then never looks fresh)
+        Returns: number of rows loaded
+        """
+        if not isinstance(transactions, TransactionTable):
+            transactions = TransactionTable.from_transactions(transactions)
+        with self.conn:
+            self._drop_indexes('transactions')
+            self.conn.execute('DELETE FROM transactions')
+            self.conn.execute('DELETE FROM enriched_products')  # Enrichment belongs to the old rows
+            count = self._insert('INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                 self._table_rows(transactions), batch_size)
+            self._build_aggregates()  # Before the indexes: sequential scans beat index walks here
+            self._create_indexes('transactions')
+            self._matched = None
+            self._set_meta('schema_version', SCHEMA_VERSION)
+            self._set_meta('source', signature)
+            self._set_meta('enriched', False)
+        self.conn.execute('ANALYZE')
+        return count
+
+    def load_enriched(self, product_mapping):
+        """
+        Resolves every stored ProductID against the catalog (product_mapping as for iter_enriched)
+        Returns: number of valid rows in the `enriched` view
+        """
+        resolver = ProductResolver(product_mapping)
+        rows = []
+        for product_id, in self.conn.execute('SELECT product_id FROM agg_product_ids').fetchall():
+            fields = resolver.enrichment(product_id)
+            rows.append((product_id, fields['API_Category'], fields['API_Brand'], fields['API_Rating'],
+                         int(fields['API_Match'])))
+        with self.conn:
+            self.conn.execute('DELETE FROM enriched_products')
+            self.conn.executemany('INSERT INTO enriched_products VALUES (?, ?, ?, ?, ?)', rows)
+            self._set_meta('enriched', True)
+        return self.conn.execute('SELECT COALESCE(SUM(row_count), 0) FROM agg_product_ids').fetchone()[0]
+
+    def has_enrichment(self):
+        """True once load_enriched() ran for the stored rows"""
+        return self._meta('enriched') is True
+
+
+    # ---------- Queries ----------
+    @staticmethod
+    def _where(region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+        """WHERE clause + parameters for the valid rows passing the filters (falsy filters are off, as in passes_filters)"""
+        clauses, params = ['valid = 1'], []
+        for value, clause in ((region, 'region = ?'), (min_amount, 'amount >= ?'), (max_amount, 'amount <= ?'),
+                              (start_date, 'date >= ?'), (end_date, 'date <= ?')):
+            if value:
+                clauses.append(clause)
+                params.append(value)
+        return 'WHERE ' + ' AND '.join(clauses), params
+
+    def _grouped(self, name, filters, tail='', params=()):
+        """Runs SELECT * FROM <grouping> <tail> - on agg_<name> when no filter is set"""
+        where, filter_params = self._where(**filters)
+        if not filter_params:
+            source = f'agg_{name}'
+        else:
+            if self._matched != (where, filter_params):
+                # Rows in id order, so sums and first-seen ties follow the file like the Python backend
+                self.conn.execute('DROP TABLE IF EXISTS temp.matched')
+                self.conn.execute(f'CREATE TEMP TABLE matched AS SELECT * FROM transactions {where} ORDER BY id',
+                                  filter_params)
+                self._matched = (where, filter_params)
+            source = f"({GROUPINGS[name].format(source='temp.matched', where='')})"
+        return self.conn.execute(f'SELECT * FROM {source} {tail}', list(params)).fetchall()
+
+    def row_counts(self):
+        """(total rows, invalid rows) as validate_and_filter reports them"""
+        total, valid = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(valid), 0) FROM transactions').fetchone()
+        return total, total - valid
+
+    def calculate_total_revenue(self, **filters):
+        """Same result as calculate_total_revenue()"""
+        return round(self._grouped('summary', filters)[0][0], 2)
+
+    def region_wise_sales(self, **filters):
+        """Same result as region_wise_sales()"""
+        total_sales = self.calculate_total_revenue(**filters)
+        rows = self._grouped('regions', filters, 'ORDER BY total_sales DESC, first_id')
+        return {region: {'total_sales': total, 'transaction_count': count,
+                         'percentage': round((total / total_sales) * 100, 2)}
+                for region, total, count, _ in rows}
+
+    @staticmethod
+    def _product_rows(rows):
+        return [(name, qty, round(revenue, 2)) for name, qty, revenue, _ in rows]
+
+    def top_selling_products(self, n=5, **filters):
+        """Same result as top_selling_products()"""
+        return self._product_rows(self._grouped('products', filters, 'ORDER BY total_qty DESC, first_id LIMIT ?', (n,)))
+
+    def low_performing_products(self, threshold=10, **filters):
+        """Same result as low_performing_products()"""
+        return self._product_rows(self._grouped('products', filters, 'WHERE total_qty < ? ORDER BY total_qty, first_id',
+                                                (threshold,)))
+
+    def _customers(self, filters, tail='', params=()):
+        rows = self._grouped('customers', filters, 'ORDER BY total_spent DESC, first_id ' + tail, params)
+        return {cust: {'total_spent': spent, 'purchase_count': count, 'products_bought': products.split(','),
+                       'avg_order_value': round(spent / count, 2)}
+                for cust, spent, count, products, _ in rows}
+
+    def customer_analysis(self, **filters):
+        """Same result as customer_analysis()"""
+        return self._customers(filters)
+
+    def top_customers(self, n=5, **filters):
+        """Same result as top_customers()"""
+        return self._customers(filters, 'LIMIT ?', (n,))
+
+    def daily_sales_trend(self, **filters):
+        """Same result as daily_sales_trend()"""
+        return {date: {'revenue': round(revenue, 2), 'transaction_count': count, 'unique_customers': customers}
+                for date, revenue, count, customers in self._grouped('daily', filters, 'ORDER BY date')}
+
+    def find_peak_sales_day(self, daily=None, **filters):
+        """Same result as find_peak_sales_day() (None when nothing matches)"""
+        daily = daily if daily is not None else self.daily_sales_trend(**filters)
+        if not daily:
+            return None
+        date, data = max(daily.items(), key=lambda x: x[1]['revenue'])
+        return (date, data['revenue'], data['transaction_count'])
+
+    def product_id_counts(self, **filters):
+        """ProductID → row count in first-seen order (input for summarize_enrichment_counts)"""
+        return {pid: count for pid, count, _ in self._grouped('product_ids', filters, 'ORDER BY first_id')}
+
+    def enrichment_summary(self, **filters):
+        """Same result as summarize_enrichment_counts(), from the stored enrichment (no catalog needed)"""
+        matches = dict(self.conn.execute('SELECT product_id, api_match FROM enriched_products'))
+        return summarize_enrichment_counts(self.product_id_counts(**filters), is_match=lambda pid: matches.get(pid, 0))
+
+    def results(self, top_n=5, low_threshold=10, **filters):
+        """Same bundle as SalesAggregator.results(), answered from SQL"""
+        total, count, first, last = self._grouped('summary', filters)[0]
+        daily = self.daily_sales_trend(**filters)
+        return {
+            'total_revenue': round(total, 2),
+            'transaction_count': count,
+            'date_range': (first, last) if count else None,
+            'region_sales': self.region_wise_sales(**filters),
+            'top_products': self.top_selling_products(top_n, **filters),
+            'top_customers': self.top_customers(top_n, **filters),
+            'daily_trend': daily,
+            'peak_day': self.find_peak_sales_day(daily),
+            'low_products': self.low_performing_products(low_threshold, **filters)
+        }
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from utils.columnar import TransactionTable, StringPool, ENCODED_COLUMNS
+
+# File layout: see write_columns (also used by utils.catalog_index)
+MAGIC = b'SALESTBL'
+CACHE_VERSION = 1
+HASH_BLOCK = 1024 * 1024
+_PREFIX = struct.Struct('<8sIQ')
+
+def default_cache_file(source):
+    """data/sales_data.txt → data/.sales_data.txt.tbl"""
+    directory, name = os.path.split(source)
+    return os.path.join(directory, f'.{name}.tbl')
+
+def source_signature(source, with_hash=True):
+    """Size / mtime (and BLAKE2b) of the source file the cache was built from"""
+    stat = os.stat(source)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                digest.update(block)
+        signature['blake2b'] = digest.hexdigest()
+    return signature
+
+def _columns(table):
+    """(name, buffer) of every fixed-width column, in file order"""
+    columns = [('quantity', table.quantity), ('unit_price', table.unit_price),
+               ('transaction_id_offsets', table.transaction_ids.offsets),
+               ('transaction_id_data', table.transaction_ids.data)]
+    columns += [(f'codes.{col}', table.codes[col]) for col in ENCODED_COLUMNS]
+    return columns
+
+def write_columns(path, magic, version, header, columns):
+    """
+    Shared file framing: MAGIC | u32 version | u64 header length | JSON header | column blocks
+    Every block starts on an 8-byte boundary so it can be cast in place from an mmap;
+    header gets 'byteorder' and 'columns' (typecode / offset / nbytes per block) added
+    columns: (name, array or bytes-like) in file order. Atomic: temp file + rename
+    """
+    blocks = []
+    offset = 0
+    for name, column in columns:
+        view = memoryview(column).cast('B')
+        blocks.append((name, getattr(column, 'typecode', 'B'), offset, view))
+        offset += (len(view) + 7) // 8 * 8
+
+    header = dict(header, byteorder=sys.byteorder,
+                  columns={name: {'typecode': typecode, 'offset': start, 'nbytes': len(view)}
+                           for name, typecode, start, view in blocks})
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = (_PREFIX.size + len(header_bytes) + 7) // 8 * 8
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(_PREFIX.pack(magic, version, len(header_bytes)))
+        f.write(header_bytes)
+        for name, typecode, start, view in blocks:
+            f.seek(data_start + start)
+            f.write(view)
+    os.replace(tmp_file, path)
+
+def read_header(f, magic, version):
+    """Header of a write_columns() file (plus 'data_start') - None if magic, version or byte order differ"""
+    found, found_version, length = _PREFIX.unpack(f.read(_PREFIX.size))
+    if found != magic or found_version != version:
+        return None
+    header = json.loads(f.read(length))
+    if header['byteorder'] != sys.byteorder:
+        return None
+    header['data_start'] = (_PREFIX.size + length + 7) // 8 * 8
+    return header
+
+def column_view(buffer, header, name):
+    """Zero-copy typed view of one block of a mapped write_columns() file"""
+    spec = header['columns'][name]
+    start = header['data_start'] + spec['offset']
+    return buffer[start:start + spec['nbytes']].cast(spec['typecode'])
+
+def save_table(table, cache_file, signature):
+    """
+    Writes a parsed TransactionTable as a fixed-width columnar file (atomic: temp file + rename)
+    signature: source_signature() of the input taken BEFORE it was read - stored so load_table can tell
+    whether the cache is stale (a file that grew while being parsed then never matches the cache)
+    """
+    header = {
+        'rows': len(table),
+        'source': signature,
+        'pools': {col: table.pools[col].values for col in ENCODED_COLUMNS},
+    }
+    write_columns(cache_file, MAGIC, CACHE_VERSION, header, _columns(table))
+
+def matches_source(cached, source):
+    """
+    Is a stored source_signature() still valid for `source`?
+    Size + mtime match → fresh; same size but new mtime → compare content hashes
+    """
+    current = source_signature(source, with_hash=False)
+    if current['size'] != cached['size']:
+        return False
+    if current['mtime_ns'] == cached['mtime_ns']:
+        return True
+    return source_signature(source)['blake2b'] == cached['blake2b']
+
+def load_table(cache_file, source):
+    """
+    Opens a cached table with mmap - columns are zero-copy, read-only views into the file
+    (filter/take/analytics work as usual; append() is not supported on a mapped table)
+    Returns: TransactionTable, or None if the cache is missing, stale or unreadable
+    """
+    try:
+        f = open(cache_file, 'rb')
+    except OSError:
+        return None
+    with f:
+        try:
+            header = read_header(f, MAGIC, CACHE_VERSION)
+            if header is None or not os.path.exists(source) or not matches_source(header['source'], source):
+                return None
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (struct.error, ValueError, KeyError, OSError):
+            return None
+
+    def column(name):
+        return column_view(buffer, header, name)
+
+    table = TransactionTable()
+    try:
+        table.quantity = column('quantity')
+        table.unit_price = column('unit_price')
+        table.transaction_ids.offsets = column('transaction_id_offsets')
+        table.transaction_ids.data = column('transaction_id_data')
+        for col in ENCODED_COLUMNS:
+            table.codes[col] = column(f'codes.{col}')
+            pool = table.pools[col] = StringPool()
+            pool.values = header['pools'][col]
+            pool.codes = {value: code for code, value in enumerate(pool.values)}
+    except (KeyError, TypeError, ValueError):
+        return None  # Truncated or corrupt cache - reparse
+    if len(table) != header['rows'] or len(table.transaction_ids) != len(table):
+        return None
+    return table
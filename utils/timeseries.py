@@ -0,0 +1,109 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+
+PERIODS = ['day', 'week', 'month']
+
+def period_key(day, period):
+    """date → '2024-12-01' (day), '2024-W48' (ISO week) or '2024-12' (month)"""
+    if period == 'day':
+        return day.isoformat()
+    if period == 'week':
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == 'month':
+        return f"{day.year}-{day.month:02d}"
+    raise ValueError(f"Unknown period '{period}' (choose from {', '.join(PERIODS)})")
+
+class DailySeries:
+    """
+    Time-bucketed store over a daily trend (date string → {'revenue', 'transaction_count', ...})
+    Dates are parsed once into a sorted axis of the days that have sales, with prefix sums, so
+    - range_total(start, end) is two bisects, O(log days)
+    - rolling(window) and rollup('week' / 'month') are one pass over those days
+    - peak(period) needs no rescan of transactions
+    Only days that occur are stored, so a stray far-off date costs one entry, not the whole gap
+    Revenue is summed in integer paise (the trend is already rounded to 2 decimals),
+    so range and rollup totals are exact
+    Dates that are not YYYY-MM-DD are kept in `unparsed` and left out
+    """
+
+    def __init__(self, daily):
+        parsed = []
+        self.unparsed = []
+        for key, data in daily.items():
+            try:
+                parsed.append((date.fromisoformat(key), data))
+            except (TypeError, ValueError):
+                self.unparsed.append(key)
+        parsed.sort(key=lambda x: x[0])
+
+        self.dates = []
+        paise = []
+        counts = []
+        for day, data in parsed:
+            if not self.dates or self.dates[-1] != day:
+                self.dates.append(day)
+                paise.append(0)
+                counts.append(0)
+            paise[-1] += round(data['revenue'] * 100)
+            counts[-1] += data['transaction_count']
+        self.start = self.dates[0] if self.dates else None
+        self._ordinals = [day.toordinal() for day in self.dates]
+        self._paise = paise
+        self._counts = counts
+        self._revenue_prefix = list(accumulate(paise, initial=0))
+        self._count_prefix = list(accumulate(counts, initial=0))
+
+    @classmethod
+    def from_aggregator(cls, aggregator):
+        return cls(aggregator.daily_trend())
+
+    def __len__(self):
+        return len(self.dates)
+
+    @staticmethod
+    def _ordinal(value):
+        if isinstance(value, str):
+            value = date.fromisoformat(value)
+        return value.toordinal()
+
+    def _totals(self, lo, hi):
+        """Totals of stored days [lo, hi)"""
+        return {'revenue': (self._revenue_prefix[hi] - self._revenue_prefix[lo]) / 100,
+                'transaction_count': self._count_prefix[hi] - self._count_prefix[lo]}
+
+    def range_total(self, start=None, end=None):
+        """Revenue / transaction count from start to end (inclusive, date or 'YYYY-MM-DD') - O(log days)"""
+        lo = 0 if start is None else bisect_left(self._ordinals, self._ordinal(start))
+        hi = len(self.dates) if end is None else bisect_right(self._ordinals, self._ordinal(end))
+        return self._totals(lo, max(hi, lo))
+
+    def rolling(self, window=7):
+        """Trailing `window`-day totals for every day with sales: {'YYYY-MM-DD': totals} (partial at the start)"""
+        return {day.isoformat(): self._totals(bisect_left(self._ordinals, ordinal - window + 1), i + 1)
+                for i, (day, ordinal) in enumerate(zip(self.dates, self._ordinals))}
+
+    def rollup(self, period='week'):
+        """Totals per ISO week / month / day in chronological order: {period key: totals} (periods with sales)"""
+        buckets = {}
+        lo = 0
+        keys = [period_key(day, period) for day in self.dates]
+        for i in range(1, len(keys) + 1):
+            if i == len(keys) or keys[i] != keys[lo]:
+                buckets[keys[lo]] = self._totals(lo, i)
+                lo = i
+        return buckets
+
+    def peak(self, period='day'):
+        """(period key, revenue, transaction_count) of the highest-revenue day / week / month"""
+        if period == 'day':
+            if not self.dates:
+                return None
+            i = max(range(len(self.dates)), key=self._paise.__getitem__)  # First day wins ties
+            return (self.dates[i].isoformat(), self._paise[i] / 100, self._counts[i])
+        buckets = self.rollup(period)
+        if not buckets:
+            return None
+        key, totals = max(buckets.items(), key=lambda x: x[1]['revenue'])
+        return (key, totals['revenue'], totals['transaction_count'])
@@ -0,0 +1,194 @@
+"""
+NumPy backend for the data_processor analytics
+Works on TransactionTable columns (zero-copy views of the typed arrays) and
+returns exactly what the pure-Python functions return, same ordering included
+"""
+from utils.columnar import TransactionTable
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The numpy backend needs NumPy: pip install numpy")
+
+def _as_table(transactions):
+    if isinstance(transactions, TransactionTable):
+        return transactions
+    return TransactionTable.from_transactions(transactions)
+
+class _Columns:
+    """NumPy views of a table plus the amount column, computed once"""
+
+    def __init__(self, transactions):
+        _require_numpy()
+        table = _as_table(transactions)
+        self.table = table
+        self.n = len(table)
+        self.quantity = np.frombuffer(table.quantity, dtype=np.int64) if self.n else np.zeros(0, np.int64)
+        self.unit_price = np.frombuffer(table.unit_price, dtype=np.float64) if self.n else np.zeros(0)
+        self.amount = self.quantity * self.unit_price
+        self._groups = {}
+
+    def codes(self, col):
+        codes = self.table.codes[col]
+        return np.frombuffer(codes, dtype=np.uint32).astype(np.int64) if self.n else np.zeros(0, np.int64)
+
+    def groups(self, col):
+        """
+        Dense group ids for a column, numbered in first-seen order (like dict insertion)
+        Returns: (group id per row, decoded key per group)
+        """
+        if col not in self._groups:
+            codes = self.codes(col)
+            uniq, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            order = np.argsort(first, kind='stable')       # groups by first occurrence
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            values = self.table.pools[col].values
+            keys = [values[c] for c in uniq[order]]
+            self._groups[col] = (rank[inverse.reshape(-1)], keys)
+        return self._groups[col]
+
+def _ordered_sum(values):
+    """Left-to-right float sum (same rounding as Python's sum, unlike np.sum)"""
+    if len(values) == 0:
+        return 0.0
+    return float(np.bincount(np.zeros(len(values), dtype=np.int64), weights=values)[0])
+
+def _sorted_desc(values, n=None):
+    """
+    Indices of values sorted DESC, ties kept in original order (like sorted(reverse=True))
+    With n, only the top n are selected (argpartition) before the final small sort
+    """
+    if n is not None and n < len(values):
+        if n <= 0:
+            return np.zeros(0, dtype=np.int64)
+        kth = np.partition(values, len(values) - n)[len(values) - n]
+        candidates = np.nonzero(values >= kth)[0]      # keeps every tie at the boundary
+        order = candidates[np.argsort(-values[candidates], kind='stable')]
+        return order[:n]
+    return np.argsort(-values, kind='stable')
+
+def _product_totals(cols):
+    group, names = cols.groups('ProductName')
+    qty = np.bincount(group, weights=cols.quantity, minlength=len(names))
+    revenue = np.bincount(group, weights=cols.amount, minlength=len(names))
+    return names, qty.astype(np.int64), revenue
+
+# ============= TASK 2.1 =============
+def calculate_total_revenue(transactions, _cols=None):
+    """Calculates total revenue from all transactions"""
+    cols = _cols or _Columns(transactions)
+    return round(_ordered_sum(cols.amount), 2)
+
+def region_wise_sales(transactions, _cols=None):
+    """Analyzes sales by region - sorted by total sales DESC"""
+    cols = _cols or _Columns(transactions)
+    group, keys = cols.groups('Region')
+    sales = np.bincount(group, weights=cols.amount, minlength=len(keys))
+    counts = np.bincount(group, minlength=len(keys))
+    total_sales = calculate_total_revenue(None, cols)
+
+    regions = {}
+    for i in _sorted_desc(sales):
+        regions[keys[i]] = {
+            'total_sales': float(sales[i]),
+            'transaction_count': int(counts[i]),
+            'percentage': round((float(sales[i]) / total_sales) * 100, 2)
+        }
+    return regions
+
+def top_selling_products(transactions, n=5, _cols=None):
+    """Top n products by total quantity sold"""
+    cols = _cols or _Columns(transactions)
+    names, qty, revenue = _product_totals(cols)
+    return [(names[i], int(qty[i]), round(float(revenue[i]), 2))
+            for i in _sorted_desc(qty, n)]
+
+def _customers(cols, n=None):
+    group, keys = cols.groups('CustomerID')
+    spent = np.bincount(group, weights=cols.amount, minlength=len(keys))
+    counts = np.bincount(group, minlength=len(keys))
+
+    # Distinct (customer, product) pairs → products bought per customer
+    product_group, product_names = cols.groups('ProductName')
+    pairs = np.unique(group * max(len(product_names), 1) + product_group)
+    pair_customer = pairs // max(len(product_names), 1)
+    pair_product = pairs % max(len(product_names), 1)
+    bounds = np.searchsorted(pair_customer, np.arange(len(keys) + 1))
+
+    customers = {}
+    for i in _sorted_desc(spent, n):
+        total = float(spent[i])
+        customers[keys[i]] = {
+            'total_spent': total,
+            'purchase_count': int(counts[i]),
+            'products_bought': [product_names[p] for p in pair_product[bounds[i]:bounds[i + 1]]],
+            'avg_order_value': round(total / int(counts[i]), 2)
+        }
+    return customers
+
+def customer_analysis(transactions, _cols=None):
+    """Customer purchase patterns - sorted by total_spent DESC"""
+    return _customers(_cols or _Columns(transactions))
+
+def top_customers(transactions, n=5, _cols=None):
+    """First n entries of customer_analysis()"""
+    return _customers(_cols or _Columns(transactions), n)
+
+# ============= TASK 2.2 =============
+def daily_sales_trend(transactions, _cols=None):
+    """Daily sales trends - chronological order"""
+    cols = _cols or _Columns(transactions)
+    group, dates = cols.groups('Date')
+    revenue = np.bincount(group, weights=cols.amount, minlength=len(dates))
+    counts = np.bincount(group, minlength=len(dates))
+
+    customer_group, customer_keys = cols.groups('CustomerID')
+    pairs = np.unique(group * max(len(customer_keys), 1) + customer_group)
+    unique_customers = np.bincount(pairs // max(len(customer_keys), 1), minlength=len(dates))
+
+    daily = {}
+    for i in sorted(range(len(dates)), key=lambda i: dates[i]):
+        daily[dates[i]] = {
+            'revenue': round(float(revenue[i]), 2),
+            'transaction_count': int(counts[i]),
+            'unique_customers': int(unique_customers[i])
+        }
+    return daily
+
+def find_peak_sales_day(transactions, _cols=None, _daily=None):
+    """Find date with highest revenue"""
+    daily = _daily if _daily is not None else daily_sales_trend(transactions, _cols)
+    peak_date = max(daily.items(), key=lambda x: x[1]['revenue'])
+    date, data = peak_date
+    return (date, data['revenue'], data['transaction_count'])
+
+# ============= TASK 2.3 =============
+def low_performing_products(transactions, threshold=10, _cols=None):
+    """Products with total quantity < threshold - sorted ASC"""
+    cols = _cols or _Columns(transactions)
+    names, qty, revenue = _product_totals(cols)
+    low = np.nonzero(qty < threshold)[0]
+    low = low[np.argsort(qty[low], kind='stable')]
+    return [(names[i], int(qty[i]), round(float(revenue[i]), 2)) for i in low]
+
+def analyze_sales(transactions, top_n=5, low_threshold=10):
+    """Vectorized equivalent of aggregator.analyze_sales - same results bundle"""
+    cols = _Columns(transactions)
+    daily = daily_sales_trend(None, cols)
+    dates = list(daily)
+    return {
+        'total_revenue': calculate_total_revenue(None, cols),
+        'transaction_count': cols.n,
+        'date_range': (dates[0], dates[-1]) if dates else None,
+        'region_sales': region_wise_sales(None, cols),
+        'top_products': top_selling_products(None, top_n, cols),
+        'top_customers': top_customers(None, top_n, cols),
+        'daily_trend': daily,
+        'peak_day': find_peak_sales_day(None, _daily=daily) if daily else None,
+        'low_products': low_performing_products(None, low_threshold, cols)
+    }